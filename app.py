@@ -1,7 +1,10 @@
+import logging
 import os
+import threading
 from pathlib import Path
 from flask import Flask, render_template, request, send_from_directory, redirect, url_for, flash
-from PIL import Image, ImageOps
+import PIL
+from PIL import features
 
 # Import our processor modules
 from image_processing import (
@@ -17,7 +20,6 @@ from image_processing import (
     generate_favicons,
     generate_favicon_html,
     generate_favicon_manifest,
-    create_multi_ico_favicon,
     analyze_image_comprehensive,
     batch_analyze_images,
     WEB_FORMATS,
@@ -25,7 +27,7 @@ from image_processing import (
     THUMBNAIL_SIZES,
     CROP_METHODS,
     FAVICON_SIZES,
-    FAVICON_SPECS
+    FAVICON_SPECS_BY_KEY
 )
 
 # Import optimization suite functions
@@ -67,7 +69,7 @@ from utils.flask_helpers import (
     ALLOWED_EXT,
     DEFAULT_THUMBNAIL_QUALITY
 )
-from image_processing.utils import sanitize_filename
+from image_processing.utils import sanitize_filename, is_pillow_simd
 
 app = Flask(__name__)
 app.secret_key = "dev"  # bara för flash-meddelanden lokalt
@@ -85,7 +87,7 @@ def index():
                          thumbnail_sizes=THUMBNAIL_SIZES,
                          crop_methods=CROP_METHODS,
                          favicon_sizes=FAVICON_SIZES,
-                         favicon_specs=FAVICON_SPECS,
+                         favicon_specs=FAVICON_SPECS_BY_KEY,
                          optimization_presets=OPTIMIZATION_PRESETS,
                          web_formats=WEB_FORMATS)
 
@@ -163,7 +165,7 @@ def convert():
                          thumbnail_sizes=THUMBNAIL_SIZES,
                          crop_methods=CROP_METHODS,
                          favicon_sizes=FAVICON_SIZES,
-                         favicon_specs=FAVICON_SPECS,
+                         favicon_specs=FAVICON_SPECS_BY_KEY,
                          optimization_presets=OPTIMIZATION_PRESETS,
                          web_formats=WEB_FORMATS)
 
@@ -221,7 +223,7 @@ def responsive():
                          thumbnail_sizes=THUMBNAIL_SIZES,
                          crop_methods=CROP_METHODS,
                          favicon_sizes=FAVICON_SIZES,
-                         favicon_specs=FAVICON_SPECS,
+                         favicon_specs=FAVICON_SPECS_BY_KEY,
                          optimization_presets=OPTIMIZATION_PRESETS,
                          web_formats=WEB_FORMATS,
                          done=True, 
@@ -288,7 +290,7 @@ def thumbnail():
                          thumbnail_sizes=THUMBNAIL_SIZES,
                          crop_methods=CROP_METHODS,
                          favicon_sizes=FAVICON_SIZES,
-                         favicon_specs=FAVICON_SPECS,
+                         favicon_specs=FAVICON_SPECS_BY_KEY,
                          optimization_presets=OPTIMIZATION_PRESETS,
                          web_formats=WEB_FORMATS,
                          done=True, 
@@ -314,13 +316,25 @@ def favicon():
     background_color = request.form.get("background_color", "transparent")
     out_dir = get_output_directory(BASE_DIR, DEFAULT_OUTPUT)
 
+    # The first image also provides a traditional favicon.ico if ICO sizes were
+    # selected, reusing the sizes it has already rendered
+    ico_sizes = [s for s in selected_sizes if s.startswith("ico_")]
+    favicon_ico_path = out_dir / "favicon.ico" if ico_sizes else None
+
     # Process favicons
     all_results = []
-    for f in files:
-        results = generate_favicons(f, out_dir, selected_sizes, background_color)
+    ico_errors = []
+    for index, f in enumerate(files):
+        results = generate_favicons(f, out_dir, selected_sizes, background_color,
+                                    multi_ico_path=favicon_ico_path if index == 0 else None,
+                                    ico_errors=ico_errors)
         if results:
             all_results.extend(results)
 
+    # A failed favicon.ico is a warning; the other favicons are still returned
+    for error in ico_errors:
+        flash(f"Error creating favicon.ico: {error['error']}")
+
     # Handle results
     all_results, error_response = handle_processing_results(
         all_results, "favicon", "No images were processed. Make sure images are valid."
@@ -328,31 +342,16 @@ def favicon():
     if error_response:
         return error_response
 
-    # Create traditional favicon.ico if ICO sizes were selected
-    ico_sizes = [s for s in selected_sizes if s.startswith("ico_")]
-    if ico_sizes and files:
-        try:
-            # Reset stream for the first file
-            files[0].stream.seek(0)
-            with Image.open(files[0].stream) as im:
-                im = ImageOps.exif_transpose(im)
-                if im.mode != "RGBA":
-                    im = im.convert("RGBA")
-                
-                favicon_ico_path = out_dir / "favicon.ico"
-                create_multi_ico_favicon(im, favicon_ico_path, background_color)
-                
-                # Add to results
-                all_results.append({
-                    "name": "favicon.ico",
-                    "size_kb": round(favicon_ico_path.stat().st_size / 1024, 1),
-                    "dimensions": "16x16, 32x32, 48x48",
-                    "format": "ICO",
-                    "size_key": "multi_ico",
-                    "purpose": "Traditional multi-size favicon"
-                })
-        except Exception as e:
-            flash(f"Error creating favicon.ico: {str(e)}")
+    # Add the traditional favicon.ico to the results, if it was written
+    if favicon_ico_path is not None and not ico_errors:
+        all_results.append({
+            "name": "favicon.ico",
+            "size_kb": round(favicon_ico_path.stat().st_size / 1024, 1),
+            "dimensions": "16x16, 32x32, 48x48",
+            "format": "ICO",
+            "size_key": "multi_ico",
+            "purpose": "Traditional multi-size favicon"
+        })
 
     # ZIP download option
     if request.form.get("zip") == "on":
@@ -371,7 +370,7 @@ def favicon():
                          thumbnail_sizes=THUMBNAIL_SIZES,
                          crop_methods=CROP_METHODS,
                          favicon_sizes=FAVICON_SIZES,
-                         favicon_specs=FAVICON_SPECS,
+                         favicon_specs=FAVICON_SPECS_BY_KEY,
                          optimization_presets=OPTIMIZATION_PRESETS,
                          web_formats=WEB_FORMATS,
                          done=True, 
@@ -465,7 +464,7 @@ def optimize():
                          thumbnail_sizes=THUMBNAIL_SIZES,
                          crop_methods=CROP_METHODS,
                          favicon_sizes=FAVICON_SIZES,
-                         favicon_specs=FAVICON_SPECS,
+                         favicon_specs=FAVICON_SPECS_BY_KEY,
                          optimization_presets=OPTIMIZATION_PRESETS,
                          web_formats=WEB_FORMATS,
                          done=True, 
@@ -517,7 +516,7 @@ def analyze():
                          thumbnail_sizes=THUMBNAIL_SIZES,
                          crop_methods=CROP_METHODS,
                          favicon_sizes=FAVICON_SIZES,
-                         favicon_specs=FAVICON_SPECS,
+                         favicon_specs=FAVICON_SPECS_BY_KEY,
                          optimization_presets=OPTIMIZATION_PRESETS,
                          web_formats=WEB_FORMATS,
                          done=True,
@@ -677,13 +676,44 @@ def svg_process():
                          thumbnail_sizes=THUMBNAIL_SIZES,
                          crop_methods=CROP_METHODS,
                          favicon_sizes=FAVICON_SIZES,
-                         favicon_specs=FAVICON_SPECS,
+                         favicon_specs=FAVICON_SPECS_BY_KEY,
                          optimization_presets=OPTIMIZATION_PRESETS,
                          web_formats=WEB_FORMATS,
                          done=True,
                          svg_results=results,
                          svg_output_dir=str(svg_out_dir))
 
+def log_imaging_backend():
+    """Log which Pillow build backs the image processing"""
+    if is_pillow_simd():
+        app.logger.info("Pillow-SIMD %s active: SIMD resize and conversion enabled", PIL.__version__)
+    else:
+        app.logger.info("Stock Pillow %s active (install pillow-simd for faster resizing)", PIL.__version__)
+    
+    # JPEG encode/decode is several times faster with libjpeg-turbo's SIMD
+    # kernels; catch builds that silently fall back to plain libjpeg
+    if features.check_feature("libjpeg_turbo"):
+        app.logger.info("JPEG codec: libjpeg-turbo %s", features.version("libjpeg_turbo"))
+    else:
+        app.logger.warning("JPEG codec: libjpeg %s without libjpeg-turbo; JPEG processing will be slower",
+                           features.version("jpg"))
+
+
+
+def warm_up_templates():
+    """Compile every Jinja template ahead of the first request"""
+    for template_name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(template_name)
+
+
+# Image modules and plugins are already loaded by the imports above; template
+# compilation is the remaining one-off cost, so move it off the first request
+if not os.environ.get("DISABLE_WARM_IMPORT"):
+    threading.Thread(target=warm_up_templates, daemon=True).start()
+
+
 if __name__ == "__main__":
     # kör lokalt
+    logging.basicConfig(level=logging.INFO)
+    log_imaging_backend()
     app.run(debug=True)
@@ -0,0 +1,5 @@
+"""
+pytest configuration for the web image converter application
+Its location marks the project root, which pytest puts on sys.path so tests can
+import image_processing and utils without editing sys.path themselves
+"""
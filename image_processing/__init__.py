@@ -24,7 +24,8 @@ from .favicon_generator import (
     generate_favicon_manifest,
     create_multi_ico_favicon,
     FAVICON_SIZES,
-    FAVICON_SPECS
+    FAVICON_SPECS,
+    FAVICON_SPECS_BY_KEY
 )
 from .image_analysis import (
     analyze_image_comprehensive,
@@ -53,5 +54,6 @@ __all__ = [
     'THUMBNAIL_SIZES', 
     'CROP_METHODS',
     'FAVICON_SIZES',
-    'FAVICON_SPECS'
+    'FAVICON_SPECS',
+    'FAVICON_SPECS_BY_KEY'
 ]
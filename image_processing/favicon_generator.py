@@ -2,100 +2,206 @@
 Favicon generation utilities for web development
 Creates multiple favicon formats and sizes for modern browsers
 """
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import NamedTuple
 from PIL import Image, ImageOps
+from .utils import MAX_CASCADE_RATIO
 from .webp_converter import sanitize_filename
 
 
-# Standard favicon sizes for modern web browsers
-FAVICON_SIZES = {
-    "ico_16": (16, 16),      # Traditional favicon.ico small
-    "ico_32": (32, 32),      # Traditional favicon.ico medium  
-    "ico_48": (48, 48),      # Traditional favicon.ico large
-    "png_32": (32, 32),      # Standard favicon
-    "png_64": (64, 64),      # High-DPI favicon
-    "png_128": (128, 128),   # Chrome Web Store
-    "png_180": (180, 180),   # Apple Touch Icon
-    "png_192": (192, 192),   # Android Chrome
-    "png_512": (512, 512),   # Android Chrome (high-res)
-}
-
-# Favicon file specifications
-FAVICON_SPECS = {
-    "ico_16": {"format": "ICO", "filename": "favicon-16x16.ico"},
-    "ico_32": {"format": "ICO", "filename": "favicon-32x32.ico"},
-    "ico_48": {"format": "ICO", "filename": "favicon-48x48.ico"},
-    "png_32": {"format": "PNG", "filename": "favicon-32x32.png"},
-    "png_64": {"format": "PNG", "filename": "favicon-64x64.png"},
-    "png_128": {"format": "PNG", "filename": "favicon-128x128.png"},
-    "png_180": {"format": "PNG", "filename": "apple-touch-icon.png"},
-    "png_192": {"format": "PNG", "filename": "android-chrome-192x192.png"},
-    "png_512": {"format": "PNG", "filename": "android-chrome-512x512.png"},
-}
-
-
-def generate_favicons(file_storage, out_dir: Path, selected_sizes: list, background_color: str = "transparent"):
-    """Generate favicons in multiple sizes and formats"""
+class FaviconSpec(NamedTuple):
+    """Size and output file of one favicon"""
+    size_key: str
+    width: int
+    height: int
+    format: str
+    filename: str
+
+
+# Favicon file specifications for modern web browsers
+FAVICON_SPECS = (
+    FaviconSpec("ico_16", 16, 16, "ICO", "favicon-16x16.ico"),               # Traditional favicon.ico small
+    FaviconSpec("ico_32", 32, 32, "ICO", "favicon-32x32.ico"),               # Traditional favicon.ico medium
+    FaviconSpec("ico_48", 48, 48, "ICO", "favicon-48x48.ico"),               # Traditional favicon.ico large
+    FaviconSpec("png_32", 32, 32, "PNG", "favicon-32x32.png"),               # Standard favicon
+    FaviconSpec("png_64", 64, 64, "PNG", "favicon-64x64.png"),               # High-DPI favicon
+    FaviconSpec("png_128", 128, 128, "PNG", "favicon-128x128.png"),          # Chrome Web Store
+    FaviconSpec("png_180", 180, 180, "PNG", "apple-touch-icon.png"),         # Apple Touch Icon
+    FaviconSpec("png_192", 192, 192, "PNG", "android-chrome-192x192.png"),   # Android Chrome
+    FaviconSpec("png_512", 512, 512, "PNG", "android-chrome-512x512.png"),   # Android Chrome (high-res)
+)
+FAVICON_SPECS_BY_KEY = {spec.size_key: spec for spec in FAVICON_SPECS}
+
+# Standard favicon sizes, as (width, height) per size key
+FAVICON_SIZES = {spec.size_key: (spec.width, spec.height) for spec in FAVICON_SPECS}
+
+# ICO-sized favicons (48px and below) resample with bilinear, which is about
+# twice as fast as Lanczos and indistinguishable at that size
+SMALL_FAVICON_MAX_SIZE = 48
+
+_FAVICON_HTML = '''<!-- Standard favicon -->
+<link rel="icon" type="image/x-icon" href="/favicon.ico">
+<link rel="icon" type="image/png" sizes="32x32" href="/favicon-32x32.png">
+<link rel="icon" type="image/png" sizes="16x16" href="/favicon-16x16.png">
+
+<!-- Apple Touch Icon -->
+<link rel="apple-touch-icon" sizes="180x180" href="/apple-touch-icon.png">
+
+<!-- Android Chrome -->
+<link rel="icon" type="image/png" sizes="192x192" href="/android-chrome-192x192.png">
+<link rel="icon" type="image/png" sizes="512x512" href="/android-chrome-512x512.png">
+
+<!-- Web App Manifest (optional) -->
+<link rel="manifest" href="/site.webmanifest">'''
+
+_FAVICON_MANIFEST = '''{
+    "name": "Your App Name",
+    "short_name": "App",
+    "icons": [
+        {
+            "src": "/android-chrome-192x192.png",
+            "sizes": "192x192",
+            "type": "image/png"
+        },
+        {
+            "src": "/android-chrome-512x512.png",
+            "sizes": "512x512",
+            "type": "image/png"
+        }
+    ],
+    "theme_color": "#ffffff",
+    "background_color": "#ffffff",
+    "display": "standalone"
+}'''
+
+
+def generate_favicons(file_storage, out_dir: Path, selected_sizes: list, background_color: str = "transparent",
+                      multi_ico_path: Path = None, png_compress_level: int = 9, ico_errors: list = None):
+    """
+    Generate favicons in multiple sizes and formats, plus a multi-size favicon.ico when multi_ico_path is given.
+    A favicon.ico that cannot be created is reported in ico_errors, if given, instead of raising.
+    """
     base_filename = sanitize_filename(file_storage.filename)
     out_dir.mkdir(parents=True, exist_ok=True)
     
-    results = []
-    
     with Image.open(file_storage.stream) as im:
         # Fix rotation according to EXIF
         im = ImageOps.exif_transpose(im)
         original_size = im.size
         
-        # Convert to RGBA for consistent processing
-        if im.mode != "RGBA":
+        # Convert to RGBA for consistent processing; RGB sources stay as they
+        # are, since converting them to RGBA and back again only costs passes
+        if im.mode not in ("RGB", "RGBA"):
             im = im.convert("RGBA")
         
-        for size_key in selected_sizes:
-            if size_key not in FAVICON_SIZES:
-                continue
-                
-            target_size = FAVICON_SIZES[size_key]
-            spec = FAVICON_SPECS[size_key]
+        # A size selected twice is only written once
+        valid_specs = [FAVICON_SPECS_BY_KEY[size_key] for size_key in dict.fromkeys(selected_sizes)
+                       if size_key in FAVICON_SPECS_BY_KEY]
+        
+        # Resize largest first, deriving each size from the previous one so
+        # only the first resample runs over the full-resolution source; sizes
+        # shared by several outputs (ico_32 and png_32) are resized once
+        fitted_images = {}
+        previous = None
+        for fitted_size in sorted({_fitted_size(im.size, (spec.width, spec.height)) for spec in valid_specs}, reverse=True):
+            source = im
+            if previous is not None and previous.width / fitted_size[0] <= MAX_CASCADE_RATIO:
+                source = previous
+            fitted_images[fitted_size] = previous = source.resize(
+                fitted_size, _resample_filter(fitted_size, high_quality=False), reducing_gap=2.0
+            )
+        
+        rendered = {}
+        
+        def render(spec):
+            target_size = (spec.width, spec.height)
             
-            # Create favicon with background handling
-            favicon = create_favicon(im, target_size, background_color)
+            # Place the resized image on the favicon background
+            fitted = fitted_images[_fitted_size(im.size, target_size)]
+            favicon = rendered[target_size] = _place_on_background(fitted, target_size, background_color)
             
             # Generate filename
-            filename = spec["filename"]
+            filename = spec.filename
             out_path = out_dir / filename
             
             # Save favicon
-            save_favicon(favicon, out_path, spec["format"])
+            save_favicon(favicon, out_path, spec.format, png_compress_level)
             
-            results.append({
+            return {
                 "name": filename,
                 "size_kb": round(out_path.stat().st_size / 1024, 1),
                 "dimensions": f"{target_size[0]}x{target_size[1]}",
-                "format": spec["format"],
-                "size_key": size_key,
-                "purpose": get_favicon_purpose(size_key)
-            })
+                "format": spec.format,
+                "size_key": spec.size_key,
+                "purpose": get_favicon_purpose(spec.size_key)
+            }
+        
+        # Sizes resize and encode independently from the one decoded source
+        # and PIL releases the GIL while doing so, so render them on a thread pool
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            results = list(executor.map(render, valid_specs))
+        
+        if multi_ico_path is not None:
+            # favicon.ico comes on top of the selected sizes, so failing to
+            # create it must not throw away the favicons already written
+            try:
+                create_multi_ico_favicon(im, multi_ico_path, background_color, precomputed=rendered)
+            except Exception as e:
+                if ico_errors is None:
+                    raise
+                multi_ico_path.unlink(missing_ok=True)  # Drop a partially written file
+                ico_errors.append({
+                    "filename": file_storage.filename,
+                    "error": str(e)
+                })
     
     return results
 
 
-def create_favicon(image: Image.Image, target_size: tuple, background_color: str = "transparent"):
+def create_favicon(image: Image.Image, target_size: tuple, background_color: str = "transparent",
+                   high_quality: bool = True):
     """Create a favicon with proper sizing and background handling"""
-    target_width, target_height = target_size
+    # Resize the image
+    fitted_size = _fitted_size(image.size, target_size)
+    resized = image.resize(fitted_size, _resample_filter(fitted_size, high_quality))
     
-    # Calculate scaling to fit within target size while maintaining aspect ratio
-    original_width, original_height = image.size
+    return _place_on_background(resized, target_size, background_color)
+
+
+def _fitted_size(original_size: tuple, target_size: tuple) -> tuple:
+    """Largest size that fits within target_size while maintaining aspect ratio"""
+    target_width, target_height = target_size
+    original_width, original_height = original_size
     scale = min(target_width / original_width, target_height / original_height)
+    return int(original_width * scale), int(original_height * scale)
+
+
+def _resample_filter(size: tuple, high_quality: bool = True):
+    """Lanczos for high quality or larger favicons, bilinear for small ICO sizes"""
+    if high_quality or max(size) > SMALL_FAVICON_MAX_SIZE:
+        return Image.Resampling.LANCZOS
+    return Image.Resampling.BILINEAR
+
+
+def _place_on_background(resized: Image.Image, target_size: tuple, background_color: str = "transparent"):
+    """Center a resized image on a target_size favicon background"""
+    target_width, target_height = target_size
+    new_width, new_height = resized.size
+    transparent = background_color.lower() == "transparent"
     
-    # Calculate new size maintaining aspect ratio
-    new_width = int(original_width * scale)
-    new_height = int(original_height * scale)
-    
-    # Resize the image
-    resized = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+    # An image that fills the whole favicon needs no background canvas,
+    # unless its alpha has to be blended onto an opaque background
+    if (new_width, new_height) == (target_width, target_height):
+        if transparent:
+            return resized if resized.mode == "RGBA" else resized.convert("RGBA")
+        if "A" not in resized.getbands():
+            return resized if resized.mode == "RGB" else resized.convert("RGB")
     
     # Create final favicon with background
-    if background_color.lower() == "transparent":
+    if transparent:
         # Create transparent background
         favicon = Image.new("RGBA", target_size, (0, 0, 0, 0))
     else:
@@ -113,6 +219,11 @@ def create_favicon(image: Image.Image, target_size: tuple, background_color: str
     y_offset = (target_height - new_height) // 2
     
     if favicon.mode == "RGBA" and resized.mode == "RGBA":
+        # Compositing over a fully transparent canvas leaves the pixels as they
+        # are, so copy them; masking by their own alpha would square it
+        favicon.paste(resized, (x_offset, y_offset))
+    elif favicon.mode == "RGB" and resized.mode in ("RGBA", "LA"):
+        # Blend onto the opaque background by the image's own alpha
         favicon.paste(resized, (x_offset, y_offset), resized)
     else:
         # Convert to same mode for pasting
@@ -126,14 +237,21 @@ def create_favicon(image: Image.Image, target_size: tuple, background_color: str
     return favicon
 
 
-def save_favicon(image: Image.Image, out_path: Path, format_type: str):
+def save_favicon(image: Image.Image, out_path: Path, format_type: str, png_compress_level: int = 9):
     """Save favicon with format-specific optimizations"""
+    # Encode in memory and write the file in one call; the ICO encoder seeks
+    # back to patch its directory, which flushes a file in many small writes
+    buffer = io.BytesIO()
     if format_type == "ICO":
         # ICO format
-        image.save(out_path, format="ICO", optimize=True)
+        image.save(buffer, format="ICO", optimize=True)
     elif format_type == "PNG":
-        # PNG format with optimization
-        image.save(out_path, format="PNG", optimize=True, compress_level=9)
+        # PNG format with optimization; lower levels trade file size for
+        # encoding speed, and optimize would force level 9 again
+        image.save(buffer, format="PNG", optimize=png_compress_level >= 9, compress_level=png_compress_level)
+    else:
+        return
+    out_path.write_bytes(buffer.getvalue())
 
 
 def get_favicon_purpose(size_key: str) -> str:
@@ -154,56 +272,25 @@ def get_favicon_purpose(size_key: str) -> str:
 
 def generate_favicon_html():
     """Generate HTML code for favicon integration"""
-    html_code = '''<!-- Standard favicon -->
-<link rel="icon" type="image/x-icon" href="/favicon.ico">
-<link rel="icon" type="image/png" sizes="32x32" href="/favicon-32x32.png">
-<link rel="icon" type="image/png" sizes="16x16" href="/favicon-16x16.png">
-
-<!-- Apple Touch Icon -->
-<link rel="apple-touch-icon" sizes="180x180" href="/apple-touch-icon.png">
-
-<!-- Android Chrome -->
-<link rel="icon" type="image/png" sizes="192x192" href="/android-chrome-192x192.png">
-<link rel="icon" type="image/png" sizes="512x512" href="/android-chrome-512x512.png">
-
-<!-- Web App Manifest (optional) -->
-<link rel="manifest" href="/site.webmanifest">'''
-    
-    return html_code
+    return _FAVICON_HTML
 
 
 def generate_favicon_manifest():
     """Generate a web app manifest for PWA support"""
-    manifest = '''{
-    "name": "Your App Name",
-    "short_name": "App",
-    "icons": [
-        {
-            "src": "/android-chrome-192x192.png",
-            "sizes": "192x192",
-            "type": "image/png"
-        },
-        {
-            "src": "/android-chrome-512x512.png",
-            "sizes": "512x512",
-            "type": "image/png"
-        }
-    ],
-    "theme_color": "#ffffff",
-    "background_color": "#ffffff",
-    "display": "standalone"
-}'''
-    
-    return manifest
+    return _FAVICON_MANIFEST
 
 
-def create_multi_ico_favicon(image: Image.Image, out_path: Path, background_color: str = "transparent"):
+def create_multi_ico_favicon(image: Image.Image, out_path: Path, background_color: str = "transparent",
+                             precomputed: dict = None):
     """Create a traditional favicon.ico with multiple sizes embedded"""
     sizes = [(16, 16), (32, 32), (48, 48)]
     favicon_images = []
     
     for size in sizes:
-        favicon = create_favicon(image, size, background_color)
+        # Reuse favicons already rendered at this size on the same background
+        favicon = (precomputed or {}).get(size)
+        if favicon is None:
+            favicon = create_favicon(image, size, background_color, high_quality=False)
         # Convert to appropriate mode for ICO
         if favicon.mode == "RGBA":
             # Keep RGBA for transparency
@@ -211,11 +298,12 @@ def create_multi_ico_favicon(image: Image.Image, out_path: Path, background_colo
         else:
             favicon_images.append(favicon.convert("RGBA"))
     
-    # Save as multi-size ICO
-    favicon_images[0].save(
+    # Save as multi-size ICO; the ICO encoder drops any size larger than the
+    # image it is called on, so save from the largest one
+    favicon_images[-1].save(
         out_path,
         format="ICO",
         sizes=[(img.size[0], img.size[1]) for img in favicon_images],
-        append_images=favicon_images[1:],
+        append_images=favicon_images[:-1],
         optimize=True
     )
@@ -2,10 +2,11 @@
 Image Analysis Tools for Web Development
 Provides detailed analysis and insights about images to help with optimization decisions
 """
+import heapq
 import io
 import math
 from pathlib import Path
-from PIL import Image, ImageStat, ImageOps
+from PIL import Image, ImageChops, ImageStat, ImageOps
 from PIL.ExifTags import TAGS
 import colorsys
 from collections import Counter
@@ -21,6 +22,9 @@ LOW_COMPLEXITY_THRESHOLD = 1000
 MEDIUM_COMPLEXITY_THRESHOLD = 5000
 MAX_DOMINANT_COLORS = 3
 
+# (dx, dy) of the eight neighbours compared in edge detection
+NEIGHBOUR_OFFSETS = ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (1, -1), (-1, 1), (1, 1))
+
 
 def analyze_image_comprehensive(file_storage):
     """
@@ -104,7 +108,7 @@ def _analyze_colors(image: Image.Image) -> dict:
         if image.mode in ("RGBA", "LA"):
             # Create white background for transparent images
             rgb_image = Image.new("RGB", image.size, (255, 255, 255))
-            rgb_image.paste(image, mask=image.split()[-1] if image.mode in ("RGBA", "LA") else None)
+            rgb_image.paste(image, mask=image)
         else:
             rgb_image = image.convert("RGB")
     else:
@@ -125,14 +129,16 @@ def _analyze_colors(image: Image.Image) -> dict:
     # Sample colors for palette analysis
     sample_size = min(rgb_image.size[0], rgb_image.size[1], SAMPLE_SIZE_LIMIT)
     sample = rgb_image.resize((sample_size, sample_size), Image.Resampling.LANCZOS)
-    colors = sample.getdata()
+    pixel_count = sample_size * sample_size
     
-    # Count unique colors (simplified)
-    color_counts = Counter(colors)
+    # Count unique colors in C; a sample can hold at most one color per pixel
+    color_counts = sample.getcolors(pixel_count)
     unique_colors = len(color_counts)
     
     # Dominant colors with RGB and HEX values
-    dominant_colors_raw = color_counts.most_common(5)
+    dominant_colors_raw = [
+        (color, count) for count, color in heapq.nlargest(5, color_counts, key=lambda item: item[0])
+    ]
     dominant_colors_enhanced = []
     
     for color, count in dominant_colors_raw[:MAX_DOMINANT_COLORS]:
@@ -143,7 +149,7 @@ def _analyze_colors(image: Image.Image) -> dict:
             "hex": hex_value,
             "color": color,  # Keep for backwards compatibility
             "count": count,
-            "percentage": round((count / len(colors)) * 100, 1)
+            "percentage": round((count / pixel_count) * 100, 1)
         })
     
     # Color harmony analysis
@@ -170,27 +176,8 @@ def _analyze_complexity(image: Image.Image) -> dict:
     sample_size = min(gray.size[0], gray.size[1], EDGE_DETECTION_SAMPLE_SIZE)
     sample = gray.resize((sample_size, sample_size), Image.Resampling.LANCZOS)
     
-    # Simple edge detection using standard deviation
-    pixels = list(sample.getdata())
-    
-    # Calculate local variations
-    variations = []
-    width = sample.size[0]
-    
-    for i in range(1, len(pixels) - width - 1):
-        if i % width != 0 and (i + 1) % width != 0:  # Not on edges
-            # Compare with neighbors
-            current = pixels[i]
-            neighbors = [
-                pixels[i-1], pixels[i+1],           # horizontal
-                pixels[i-width], pixels[i+width],   # vertical
-                pixels[i-width-1], pixels[i-width+1], # diagonal
-                pixels[i+width-1], pixels[i+width+1]
-            ]
-            variation = sum(abs(current - n) for n in neighbors) / len(neighbors)
-            variations.append(variation)
-    
-    avg_variation = sum(variations) / len(variations) if variations else 0
+    # Simple edge detection using the mean difference from neighbouring pixels
+    avg_variation = _mean_neighbour_difference(sample)
     
     # Texture analysis
     if avg_variation < 10:
@@ -208,10 +195,32 @@ def _analyze_complexity(image: Image.Image) -> dict:
         "texture": texture,
         "detail_level": detail_level,
         "is_photo_likely": avg_variation > 15 and image.size[0] * image.size[1] > 50000,
-        "is_graphic_likely": avg_variation < 20 and len(set(list(image.convert("P").getdata()))) < 256
+        "is_graphic_likely": avg_variation < 20 and len(image.convert("P").getcolors(256)) < 256
     }
 
 
+def _mean_neighbour_difference(gray: Image.Image) -> float:
+    """Average absolute difference between each inner pixel and its eight neighbours"""
+    width, height = gray.size
+    # Pixels in every row but the last, excluding the first and last columns
+    inner_count = (width - 2) * (height - 1)
+    if inner_count <= 0:
+        return 0
+    
+    # The top row is compared with the bottom row above it, so stack a copy
+    # of the bottom row on top and shift whole-image crops against each other
+    padded = Image.new("L", (width, height + 1))
+    padded.paste(gray.crop((0, height - 1, width, height)), (0, 0))
+    padded.paste(gray, (0, 1))
+    inner = padded.crop((1, 1, width - 1, height))
+    
+    total = 0
+    for dx, dy in NEIGHBOUR_OFFSETS:
+        neighbours = padded.crop((1 + dx, 1 + dy, width - 1 + dx, height + dy))
+        total += ImageStat.Stat(ImageChops.difference(inner, neighbours)).sum[0]
+    return total / (len(NEIGHBOUR_OFFSETS) * inner_count)
+
+
 def _analyze_color_harmony(dominant_colors) -> dict:
     """Analyze color harmony and palette characteristics"""
     if len(dominant_colors) < 2:
@@ -2,13 +2,23 @@
 Image Optimization Suite for Web Performance
 Advanced optimization tools for reducing file sizes and improving web performance
 """
+import hashlib
+import shutil
+from collections import Counter
 from pathlib import Path
-from PIL import Image, ImageOps
+from PIL import ExifTags, Image, ImageOps
 from PIL.ExifTags import TAGS
 import io
-from .webp_converter import sanitize_filename, WEB_FORMATS, _convert_for_format, _save_image
+from .utils import parallel_map
+from .webp_converter import (
+    sanitize_filename, WEB_FORMATS, _convert_for_format, _save_image, _HAS_AVIF, AVIF_ENCODER_SPEED
+)
 
 
+# Lossless output formats: an unchanged upload already in one of them holds
+# the same pixels as its re-encode, so whichever file is smaller can be kept
+PASSTHROUGH_FORMATS = ("png",)
+
 # Optimization preset configurations
 OPTIMIZATION_PRESETS = {
     "web_basic": {
@@ -84,6 +94,11 @@ def optimize_image(file_storage, out_dir: Path, preset: str, output_format: str
     out_dir.mkdir(parents=True, exist_ok=True)
     
     with Image.open(file_storage.stream) as im:
+        source_format = im.format
+        interlaced = bool(im.info.get("interlace"))
+        # Without an orientation other than 1, transposing leaves the pixels as they are
+        upright = im.getexif().get(ExifTags.Base.Orientation, 1) == 1
+        
         # Fix rotation according to EXIF
         im = ImageOps.exif_transpose(im)
         original_size = im.size
@@ -104,7 +119,7 @@ def optimize_image(file_storage, out_dir: Path, preset: str, output_format: str
             output_format = "webp"  # Fallback to WebP
         
         format_info = WEB_FORMATS[output_format]
-        filename = f"{base_filename}_optimized{format_info['ext']}"
+        filename = f"{base_filename}_optimized{format_info.ext}"
         out_path = out_dir / filename
         
         # Convert for target format
@@ -113,6 +128,25 @@ def optimize_image(file_storage, out_dir: Path, preset: str, output_format: str
         # Save with optimization settings
         _save_optimized_image(converted_image, out_path, output_format, preset_config)
         
+        # When a lossless format stays the same and neither pixels nor metadata
+        # change, the upload is an equally valid result; keep it if the
+        # re-encode did not make the file any smaller
+        passthrough = False
+        if (
+            output_format in PASSTHROUGH_FORMATS
+            and output_format.upper() == source_format
+            and custom_quality is None
+            and optimized_image is im
+            and upright
+            and not preset_config["strip_metadata"]
+        ):
+            file_storage.stream.seek(0)
+            original_bytes = file_storage.stream.read()
+            if len(original_bytes) <= out_path.stat().st_size:
+                out_path.write_bytes(original_bytes)
+                converted_image = im
+                passthrough = True
+        
         # Calculate compression statistics
         file_size = out_path.stat().st_size
         original_estimated_size = _estimate_original_size(im)
@@ -122,17 +156,19 @@ def optimize_image(file_storage, out_dir: Path, preset: str, output_format: str
             "filename": filename,
             "size_bytes": file_size,
             "size_kb": round(file_size / 1024, 1),
-            "format": format_info["name"],
+            "format": format_info.name,
             "original_dimensions": f"{original_size[0]}x{original_size[1]}",
             "optimized_dimensions": f"{converted_image.size[0]}x{converted_image.size[1]}",
             "original_mode": original_mode,
             "optimized_mode": converted_image.mode,
-            "quality": preset_config["quality"],
+            # A kept upload was never encoded with the preset's settings
+            "quality": None if passthrough else preset_config["quality"],
             "preset": preset_config["name"],
             "compression_ratio": round(compression_ratio, 1),
             "metadata_stripped": preset_config["strip_metadata"],
-            "progressive": preset_config.get("progressive", False),
-            "metadata": metadata
+            "progressive": interlaced if passthrough else preset_config.get("progressive", False),
+            "metadata": metadata,
+            "passthrough": passthrough
         }
 
 
@@ -140,27 +176,76 @@ def batch_optimize_images(file_list, out_dir: Path, preset: str, output_format:
     """
     Optimize multiple images with the same settings
     """
-    results = []
-    errors = []
-    total_original_size = 0
-    total_optimized_size = 0
-    
-    for file_storage in file_list:
+    name_counts = Counter(sanitize_filename(file_storage.filename) for file_storage in file_list)
+    
+    # An upload whose bytes and extension match an earlier one is optimized
+    # identically, so it is copied from that upload's output instead of being
+    # decoded and encoded again; only uploads with their own output name
+    # qualify, so the copy can never overwrite or be overwritten by another
+    sources = {}
+    duplicates = {}
+    entries = []
+    outcomes = []
+    for index, file_storage in enumerate(file_list):
         try:
-            # Calculate original size for statistics
-            original_size = len(file_storage.stream.read())
+            data = file_storage.stream.read()
             file_storage.stream.seek(0)  # Reset stream
-            total_original_size += original_size
-            
-            result = optimize_image(file_storage, out_dir, preset, output_format)
-            results.append(result)
-            total_optimized_size += result["size_bytes"]
-            
         except Exception as e:
-            errors.append({
+            outcomes.append((index, 0, None, {
                 "filename": file_storage.filename,
                 "error": str(e)
-            })
+            }))
+            continue
+        
+        # Calculate original size for statistics
+        entry = (index, file_storage, len(data))
+        key = (hashlib.blake2b(data, digest_size=16).digest(), Path(file_storage.filename).suffix.lower())
+        if key in sources and name_counts[sanitize_filename(file_storage.filename)] == 1:
+            duplicates.setdefault(sources[key], []).append(entry)
+            continue
+        sources.setdefault(key, index)
+        entries.append(entry)
+    
+    def optimize_entry(entry):
+        index, file_storage, original_size = entry
+        entry_outcomes = []
+        try:
+            result = optimize_image(file_storage, out_dir, preset, output_format)
+            entry_outcomes.append((index, original_size, result, None))
+        except Exception as e:
+            result = None
+            error = str(e)
+            entry_outcomes.append((index, original_size, None, {
+                "filename": file_storage.filename,
+                "error": error
+            }))
+        
+        # Copy right away, before a later upload with the same output name replaces it
+        for dup_index, dup_storage, dup_size in duplicates.get(index, ()):
+            try:
+                if result is None:
+                    raise ValueError(error)
+                filename = f"{sanitize_filename(dup_storage.filename)}_optimized{Path(result['filename']).suffix}"
+                shutil.copyfile(out_dir / result["filename"], out_dir / filename)
+                entry_outcomes.append((dup_index, dup_size, {**result, "filename": filename}, None))
+            except Exception as e:
+                entry_outcomes.append((dup_index, dup_size, None, {
+                    "filename": dup_storage.filename,
+                    "error": str(e)
+                }))
+        return entry_outcomes
+    
+    # Uploads that sanitize to the same output name overwrite each other, so
+    # they are grouped by that name
+    for entry_outcomes in parallel_map(optimize_entry, entries,
+                                       group_key=lambda entry: sanitize_filename(entry[1].filename)):
+        outcomes += entry_outcomes
+    outcomes.sort(key=lambda outcome: outcome[0])
+    
+    results = [result for _, _, result, error in outcomes if error is None]
+    errors = [error for _, _, _, error in outcomes if error is not None]
+    total_original_size = sum(original_size for _, original_size, _, _ in outcomes)
+    total_optimized_size = sum(result["size_bytes"] for result in results)
     
     # Calculate batch statistics
     batch_stats = {
@@ -193,7 +278,9 @@ def _resize_if_needed(image: Image.Image, max_width: int, max_height: int) -> Im
     new_width = int(width * scale)
     new_height = int(height * scale)
     
-    return image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+    # Box-reduce the source to within twice the target before the Lanczos
+    # pass, which then convolves far fewer pixels on large downscales
+    return image.resize((new_width, new_height), Image.Resampling.LANCZOS, reducing_gap=2.0)
 
 
 def _determine_optimal_format(image: Image.Image, original_filename: str) -> str:
@@ -255,21 +342,13 @@ def _save_optimized_image(image: Image.Image, out_path: Path, output_format: str
         })
     
     elif output_format == "avif":
-        try:
-            save_kwargs.update({
-                "format": "AVIF",
-                "quality": config["quality"]
-            })
-        except Exception:
-            # Fallback to WebP
-            save_kwargs.update({
-                "format": "WEBP",
-                "method": 6,
-                "quality": config["quality"],
-                "optimize": config["optimize"]
-            })
-            # Update path extension
-            out_path = out_path.with_suffix(".webp")
+        if not _HAS_AVIF:
+            raise ValueError("AVIF encoding is not available; install pillow-avif-plugin")
+        save_kwargs.update({
+            "format": "AVIF",
+            "quality": config["quality"],
+            "speed": AVIF_ENCODER_SPEED
+        })
     
     # Strip metadata if requested
     if config.get("strip_metadata", True):
@@ -300,23 +379,25 @@ def extract_image_metadata(image: Image.Image) -> dict:
     """
     Extract useful metadata from image
     """
+    # Every _getexif() call parses the EXIF block again, so read it once;
+    # only header fields are used, so the pixel data is never decoded
+    exif_dict = image._getexif() if hasattr(image, '_getexif') else None
+    
     metadata = {
         "format": image.format,
         "mode": image.mode,
         "size": image.size,
-        "has_exif": hasattr(image, '_getexif') and image._getexif() is not None
+        "has_exif": exif_dict is not None
     }
     
     # Extract EXIF data if present
-    if hasattr(image, '_getexif') and image._getexif():
-        exif_dict = image._getexif()
-        if exif_dict:
-            exif_data = {}
-            for tag_id, value in exif_dict.items():
-                tag = TAGS.get(tag_id, tag_id)
-                if tag in ["DateTime", "Make", "Model", "Software", "ImageWidth", "ImageLength"]:
-                    exif_data[tag] = str(value)
-            metadata["exif"] = exif_data
+    if exif_dict:
+        exif_data = {}
+        for tag_id, value in exif_dict.items():
+            tag = TAGS.get(tag_id, tag_id)
+            if tag in ["DateTime", "Make", "Model", "Software", "ImageWidth", "ImageLength"]:
+                exif_data[tag] = str(value)
+        metadata["exif"] = exif_data
     
     return metadata
 
@@ -333,21 +414,15 @@ def analyze_image_complexity(image: Image.Image) -> dict:
     
     # Sample the image for analysis (for performance)
     sample_size = min(image.size[0], image.size[1], 200)
+    # Box-reduce large sources first so Lanczos only runs over a few times the
+    # sample size; the colour ranges are statistical and survive the averaging
+    factor = min(rgb_image.size) // (sample_size * 2)
+    if factor >= 2:
+        rgb_image = rgb_image.reduce(factor)
     sample = rgb_image.resize((sample_size, sample_size), Image.Resampling.LANCZOS)
     
-    # Calculate color statistics
-    pixels = list(sample.getdata())
-    
-    # Calculate color variation
-    r_values = [p[0] for p in pixels]
-    g_values = [p[1] for p in pixels]
-    b_values = [p[2] for p in pixels]
-    
-    r_range = max(r_values) - min(r_values)
-    g_range = max(g_values) - min(g_values)
-    b_range = max(b_values) - min(b_values)
-    
-    avg_range = (r_range + g_range + b_range) / 3
+    # Calculate color variation from the per-channel extrema
+    avg_range = sum(high - low for low, high in sample.getextrema()) / 3
     
     # Determine complexity
     if avg_range < 50:
@@ -376,26 +451,35 @@ def generate_optimization_report(results: list, batch_stats: dict = None) -> dic
     if not results:
         return {"error": "No results to analyze"}
     
-    # Calculate aggregate statistics
     total_files = len(results)
-    total_original_kb = sum(r.get("size_kb", 0) for r in results)
-    avg_compression = sum(r.get("compression_ratio", 0) for r in results) / total_files
-    
-    # Format breakdown
+
+    # Reshape the result dicts into columns in a single pass
+    sizes = []
+    ratios = []
     format_breakdown = {}
-    for result in results:
-        fmt = result.get("format", "Unknown")
-        if fmt not in format_breakdown:
-            format_breakdown[fmt] = {"count": 0, "total_kb": 0}
-        format_breakdown[fmt]["count"] += 1
-        format_breakdown[fmt]["total_kb"] += result.get("size_kb", 0)
-    
-    # Quality distribution
     quality_distribution = {}
     for result in results:
-        quality = result.get("quality", "Unknown")
+        size_kb = result.get("size_kb", 0)
+        sizes.append(size_kb)
+        ratios.append(result.get("compression_ratio", 0))
+
+        # Format breakdown
+        fmt = result.get("format", "Unknown")
+        breakdown = format_breakdown.get(fmt)
+        if breakdown is None:
+            breakdown = format_breakdown[fmt] = {"count": 0, "total_kb": 0}
+        breakdown["count"] += 1
+        breakdown["total_kb"] += size_kb
+
+        # Quality distribution
+        # Copied uploads report no quality of their own
+        quality = result.get("quality") or "Unknown"
         quality_distribution[quality] = quality_distribution.get(quality, 0) + 1
-    
+
+    # Calculate aggregate statistics
+    total_original_kb = sum(sizes)
+    avg_compression = sum(ratios) / total_files
+
     report = {
         "summary": {
             "total_files": total_files,
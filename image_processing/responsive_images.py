@@ -1,8 +1,11 @@
 """
 Responsive image generation utilities
 """
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from PIL import Image, ImageOps
+from PIL import ExifTags, Image, ImageOps
+from .utils import MAX_CASCADE_RATIO
 from .webp_converter import sanitize_filename
 
 
@@ -16,20 +19,28 @@ RESPONSIVE_SIZES = {
     "desktop-xl": 1920
 }
 
+# JPEG sources are decoded at a reduced DCT scale, but never below this many
+# times the largest breakpoint so the LANCZOS pass still has detail to work with
+JPEG_DRAFT_GAP = 2
+
+_SRCSET_HTML_TEMPLATE = '''<img src="{src}" 
+     srcset="{srcset}"
+     sizes="(max-width: 480px) 320px, (max-width: 768px) 480px, (max-width: 1024px) 768px, 1024px"
+     alt="Responsive image" />'''
+
 
 def generate_responsive_images(file_storage, out_dir: Path, quality: int, lossless: bool, selected_sizes: list):
     """Generate multiple sizes of an image for responsive web design"""
     base_filename = sanitize_filename(file_storage.filename)
     out_dir.mkdir(parents=True, exist_ok=True)
     
-    results = []
-    
     with Image.open(file_storage.stream) as im:
-        # Fix rotation according to EXIF
-        im = ImageOps.exif_transpose(im)
-        original_width, original_height = im.size
+        original_width, original_height = _oriented_size(im)
         
-        for size_name in selected_sizes:
+        # (size name, width, height) of every breakpoint to generate; a size
+        # selected twice is only written once
+        targets = []
+        for size_name in dict.fromkeys(selected_sizes):
             if size_name not in RESPONSIVE_SIZES:
                 continue
                 
@@ -42,9 +53,35 @@ def generate_responsive_images(file_storage, out_dir: Path, quality: int, lossle
             # Calculate proportional height
             ratio = target_width / original_width
             target_height = int(original_height * ratio)
-            
-            # Resize image
-            resized = im.resize((target_width, target_height), Image.Resampling.LANCZOS)
+            targets.append((size_name, target_width, target_height))
+        
+        if targets and im.format == "JPEG":
+            # Let libjpeg scale by 1/2, 1/4 or 1/8 while decoding instead of
+            # decoding every pixel only to throw most of them away
+            draft_size = (
+                max(target[1] for target in targets) * JPEG_DRAFT_GAP,
+                max(target[2] for target in targets) * JPEG_DRAFT_GAP,
+            )
+            if (original_width, original_height) != im.size:
+                draft_size = draft_size[::-1]
+            im.draft(None, draft_size)
+        
+        # Fix rotation according to EXIF
+        im = ImageOps.exif_transpose(im)
+        
+        # Resize largest first, deriving each breakpoint from the previous one
+        # so only the first resample runs over the full-resolution source
+        resized_images = {}
+        previous = None
+        for size_name, target_width, target_height in sorted(targets, key=lambda target: target[1], reverse=True):
+            source = im
+            if previous is not None and previous.width / target_width <= MAX_CASCADE_RATIO:
+                source = previous
+            resized_images[size_name] = previous = source.resize((target_width, target_height), Image.Resampling.LANCZOS)
+        
+        def render(target):
+            size_name, target_width, target_height = target
+            resized = resized_images[size_name]
             
             # Generate filename with size suffix
             filename = f"{base_filename}-{size_name}-{target_width}w.webp"
@@ -52,7 +89,8 @@ def generate_responsive_images(file_storage, out_dir: Path, quality: int, lossle
             
             # Save as WebP
             if lossless:
-                if resized.mode not in ("RGBA", "LA"):
+                # The encoder takes RGB as is, so only other modes need an RGBA copy
+                if resized.mode not in ("RGB", "RGBA", "LA"):
                     resized = resized.convert("RGBA")
                 resized.save(out_path, format="WEBP", lossless=True, method=6)
             else:
@@ -60,12 +98,19 @@ def generate_responsive_images(file_storage, out_dir: Path, quality: int, lossle
                     resized = resized.convert("RGBA" if "A" in resized.getbands() else "RGB")
                 resized.save(out_path, format="WEBP", quality=quality, method=6)
             
-            results.append({
+            return {
                 "name": filename,
                 "size_kb": round(out_path.stat().st_size / 1024, 1),
                 "dimensions": f"{target_width}x{target_height}",
+                "width": target_width,
+                "height": target_height,
                 "size_name": size_name
-            })
+            }
+        
+        # Breakpoints encode independently and PIL releases the GIL while
+        # encoding, so save them on a thread pool
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            results = list(executor.map(render, targets))
     
     return results
 
@@ -86,21 +131,24 @@ def generate_srcset_html(results):
     html_examples = []
     for base_name, items in grouped.items():
         # Sort by width
-        items.sort(key=lambda x: int(x["dimensions"].split("x")[0]))
+        sized = sorted(((_item_width(item), item) for item in items), key=lambda pair: pair[0])
         
-        srcset_parts = []
-        for item in items:
-            width = item["dimensions"].split("x")[0]
-            srcset_parts.append(f"{item['name']} {width}w")
-        
-        srcset = ", ".join(srcset_parts)
-        largest_item = items[-1]  # Fallback to largest image
-        
-        html = f'''<img src="{largest_item['name']}" 
-     srcset="{srcset}"
-     sizes="(max-width: 480px) 320px, (max-width: 768px) 480px, (max-width: 1024px) 768px, 1024px"
-     alt="Responsive image" />'''
+        srcset = ", ".join(f"{item['name']} {width}w" for width, item in sized)
+        largest_item = sized[-1][1]  # Fallback to largest image
         
-        html_examples.append(html)
+        html_examples.append(_SRCSET_HTML_TEMPLATE.format(src=largest_item["name"], srcset=srcset))
     
     return html_examples
+
+
+def _oriented_size(image):
+    """Return the (width, height) the image will have after EXIF transposing"""
+    if image.getexif().get(ExifTags.Base.Orientation) in (5, 6, 7, 8):
+        return image.height, image.width
+    return image.size
+
+
+def _item_width(item):
+    """Width of a result item, parsed from its dimensions string for older results"""
+    width = item.get("width")
+    return width if width is not None else int(item["dimensions"].split("x")[0])
@@ -2,14 +2,36 @@
 SVG Toolkit for Mobile App Development
 Comprehensive SVG processing, optimization, and conversion tools
 """
+import hashlib
+import os
 import re
+import threading
 import xml.etree.ElementTree as ET
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional, Union
+from typing import IO, Dict, List, Tuple, Optional, Union
 from PIL import Image, ImageDraw
 import io
 import base64
 
+try:
+    import cairosvg
+    _HAS_CAIRO = True
+except (ImportError, OSError):
+    # OSError: the package is installed but the native cairo library is not
+    cairosvg = None
+    _HAS_CAIRO = False
+
+try:
+    # Optional: resvg bindings rasterize considerably faster than cairosvg
+    import resvg_py as _resvg
+except ImportError:
+    _resvg = None
+
+# Whether real SVG rendering is available; otherwise placeholders are drawn
+_CAN_RASTERIZE = _HAS_CAIRO or _resvg is not None
+
 # Constants for mobile app development
 MOBILE_DENSITIES = {
     "mdpi": 1.0,    # Android baseline (160dpi)
@@ -49,76 +71,79 @@ FLUTTER_ICON_SIZES = {
     "adaptive": 108
 }
 
+# Placeholder PNGs are throwaway output, so favour encode speed over size
+PLACEHOLDER_PNG_COMPRESS_LEVEL = 1
+
+# Precompiled patterns for optimize_svg; related patterns are merged into
+# single alternations so each pass walks the document only once
+_COMMENT_RE = re.compile(r'<!--.*?-->', re.DOTALL)
+_EDITOR_ELEMENTS_RE = re.compile(
+    r'<(?:metadata.*?</metadata>'
+    r'|(?:sodipodi|inkscape|cc|dc):.*?>'
+    r'|rdf:.*?</rdf:.*?>)',
+    re.DOTALL | re.IGNORECASE
+)
+# Kept out of the editor-element alternation: a <defs> only becomes empty
+# once the editor elements inside it are gone, so it needs a later pass
+_EMPTY_DEFS_RE = re.compile(r'<defs>\s*</defs>', re.IGNORECASE)
+_EDITOR_ATTRS_RE = re.compile(
+    r'\s+(?:xmlns:(?:sodipodi|inkscape|cc|dc|rdf)|(?:sodipodi|inkscape):[^=]*)="[^"]*"',
+    re.IGNORECASE
+)
+_EDITOR_ELEMENT_MARKERS = ('<metadata', '<sodipodi:', '<inkscape:', '<cc:', '<dc:', '<rdf:')
+_EDITOR_ATTR_MARKERS = ('xmlns:', 'sodipodi:', 'inkscape:')
+_LONG_DECIMAL_RE = re.compile(r'\d+\.\d{3,}')
+_DEFAULT_ATTRS_RE = re.compile(r'\s+(?:fill="none"|stroke="none"|stroke-width="1")(?=\s|>)')
+_WHITESPACE_RE = re.compile(r'\s+')
+_TAG_GAP_RE = re.compile(r'>\s+<')
+
+# Translation table that deletes path command letters; the length lost when
+# applying it is the command count, without building a list of matches
+_PATH_COMMAND_DELETE = str.maketrans('', '', 'MmLlHhVvCcSsQqTtAaZz')
+
+# Color references in presentation attributes (fill="...") and inline
+# styles (fill:...), captured as (prefix, color) pairs
+_COLOR_REF_RE = re.compile(
+    r'((?:fill|stroke|stop-color)=")([^"]*)(?=")'
+    r'|((?:fill|stroke):)(\w+\([^)]*\)|[^;"\'\s}]+)'
+)
+
+
+# Number of recently parsed documents whose _SvgState is kept for reuse
+SVG_PARSE_CACHE_SIZE = 32
+
+# _SvgState of recently parsed strings by content digest, least recent first
+_parse_cache = OrderedDict()
+_parse_cache_lock = threading.Lock()
+
+# Everything validate_svg and analyze_svg_complexity need from the document,
+# gathered by _scan_svg in a single streaming pass
+_SvgState = namedtuple('_SvgState', [
+    'root_tag', 'has_viewbox', 'has_width', 'has_height',
+    'title_found', 'desc_found', 'gradients_count', 'filters_count',
+    'total_elements', 'element_counts',
+    'path_count', 'total_path_commands', 'complex_paths',
+    'size', 'has_data_uri'
+])
 
-def validate_svg(svg_content: str) -> Dict[str, Union[bool, List[str]]]:
+
+def validate_svg(svg_content: Union[str, bytes, IO]) -> Dict[str, Union[bool, List[str]]]:
     """
     Validate SVG content and check for common issues.
     
     Args:
-        svg_content: SVG content as string
+        svg_content: SVG content as string or bytes, or a file-like object
+            which is parsed incrementally without reading it into memory
         
     Returns:
         dict: Validation results with issues found
     """
-    issues = []
-    
     try:
-        # Parse XML
-        root = ET.fromstring(svg_content)
-        
-        # Check for SVG namespace
-        if not root.tag.endswith('svg'):
-            issues.append("Root element is not <svg>")
-            
-        # Check for viewBox
-        if 'viewBox' not in root.attrib:
-            issues.append("Missing viewBox attribute (recommended for scalability)")
-            
-        # Check for width/height
-        has_width = 'width' in root.attrib
-        has_height = 'height' in root.attrib
-        if not has_width or not has_height:
-            issues.append("Missing width or height attributes")
-            
-        # Check for accessibility
-        title_found = False
-        desc_found = False
-        for elem in root.iter():
-            if elem.tag.endswith('title'):
-                title_found = True
-            elif elem.tag.endswith('desc'):
-                desc_found = True
-        if not title_found and not desc_found:
-            issues.append("Missing accessibility elements (title or desc)")
-            
-        # Check for embedded content
-        if 'data:' in svg_content:
-            issues.append("Contains embedded images (may increase file size)")
-            
-        # Check for complex gradients/filters
-        gradients = []
-        filters = []
-        for elem in root.iter():
-            if elem.tag.endswith('linearGradient') or elem.tag.endswith('radialGradient'):
-                gradients.append(elem)
-            elif elem.tag.endswith('filter'):
-                filters.append(elem)
-        if len(gradients) > 5:
-            issues.append(f"Many gradients ({len(gradients)}) may impact performance")
-        if len(filters) > 0:
-            issues.append(f"Contains filters ({len(filters)}) - check mobile compatibility")
-            
+        state = _load_state(svg_content)
     except ET.ParseError as e:
-        issues.append(f"XML parsing error: {str(e)}")
-        return {"valid": False, "issues": issues}
+        return {"valid": False, "issues": [f"XML parsing error: {str(e)}"]}
     
-    return {
-        "valid": len(issues) == 0,
-        "issues": issues,
-        "elements_count": len(root.findall(".//*")),
-        "has_viewbox": 'viewBox' in root.attrib,
-        "has_dimensions": has_width and has_height
-    }
+    return _validate_from_state(state)
 
 
 def optimize_svg(svg_content: str, aggressive: bool = False) -> Dict[str, Union[str, int, float]]:
@@ -136,57 +161,36 @@ def optimize_svg(svg_content: str, aggressive: bool = False) -> Dict[str, Union[
     optimized = svg_content
     
     # Remove comments
-    optimized = re.sub(r'<!--.*?-->', '', optimized, flags=re.DOTALL)
+    if '<!--' in optimized:
+        optimized = _COMMENT_RE.sub('', optimized)
+    
+    # Cheap substring checks let clean SVGs skip the regex passes entirely
+    lowered = optimized.lower()
     
     # Remove metadata and editor-specific elements
-    remove_elements = [
-        r'<metadata.*?</metadata>',
-        r'<defs>\s*</defs>',
-        r'<sodipodi:.*?>',
-        r'<inkscape:.*?>',
-        r'<cc:.*?>',
-        r'<dc:.*?>',
-        r'<rdf:.*?</rdf:.*?>'
-    ]
-    
-    for pattern in remove_elements:
-        optimized = re.sub(pattern, '', optimized, flags=re.DOTALL | re.IGNORECASE)
+    if any(marker in lowered for marker in _EDITOR_ELEMENT_MARKERS):
+        optimized = _EDITOR_ELEMENTS_RE.sub('', optimized)
+        lowered = optimized.lower()
+    
+    # Remove <defs> left empty, including those emptied by the pass above
+    if '<defs' in lowered:
+        optimized = _EMPTY_DEFS_RE.sub('', optimized)
     
     # Remove unnecessary attributes
-    remove_attrs = [
-        r'\s+xmlns:sodipodi="[^"]*"',
-        r'\s+xmlns:inkscape="[^"]*"',
-        r'\s+xmlns:cc="[^"]*"',
-        r'\s+xmlns:dc="[^"]*"',
-        r'\s+xmlns:rdf="[^"]*"',
-        r'\s+sodipodi:[^=]*="[^"]*"',
-        r'\s+inkscape:[^=]*="[^"]*"'
-    ]
-    
-    for pattern in remove_attrs:
-        optimized = re.sub(pattern, '', optimized, flags=re.IGNORECASE)
+    if any(marker in lowered for marker in _EDITOR_ATTR_MARKERS):
+        optimized = _EDITOR_ATTRS_RE.sub('', optimized)
     
     if aggressive:
         # Reduce decimal precision
-        def reduce_precision(match):
-            number = float(match.group())
-            return f"{number:.2f}"
-        
-        optimized = re.sub(r'\d+\.\d{3,}', reduce_precision, optimized)
+        optimized = _LONG_DECIMAL_RE.sub(_reduce_precision, optimized)
         
         # Remove default attributes
-        default_attrs = [
-            r'\s+fill="none"(?=\s|>)',
-            r'\s+stroke="none"(?=\s|>)',
-            r'\s+stroke-width="1"(?=\s|>)'
-        ]
-        
-        for pattern in default_attrs:
-            optimized = re.sub(pattern, '', optimized)
+        if '="none"' in optimized or 'stroke-width="1"' in optimized:
+            optimized = _DEFAULT_ATTRS_RE.sub('', optimized)
     
     # Clean up whitespace
-    optimized = re.sub(r'\s+', ' ', optimized)
-    optimized = re.sub(r'>\s+<', '><', optimized)
+    optimized = _WHITESPACE_RE.sub(' ', optimized)
+    optimized = _TAG_GAP_RE.sub('><', optimized)
     optimized = optimized.strip()
     
     final_size = len(optimized)
@@ -219,52 +223,39 @@ def svg_to_png_multi_density(svg_content: str, base_size: int, output_dir: Path,
     if densities is None:
         densities = MOBILE_DENSITIES
     
-    try:
-        # Try to use cairosvg for better SVG rendering
-        import cairosvg
-        
-        results = []
-        output_dir.mkdir(parents=True, exist_ok=True)
+    results = []
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    # (density, multiplier, size, filename, output path) for every density
+    outputs = []
+    for density_name, multiplier in densities.items():
+        size = int(base_size * multiplier)
+        filename = f"{filename_base}_{density_name}_{size}px.png"
+        outputs.append((density_name, multiplier, size, filename, output_dir / filename))
+    
+    if _CAN_RASTERIZE:
+        # Render with resvg or cairosvg, whichever is installed
+        tasks = [(size, output_path) for _, _, size, _, output_path in outputs]
+        file_sizes = _render_pngs(svg_content.encode('utf-8'), tasks)
         
-        for density_name, multiplier in densities.items():
-            size = int(base_size * multiplier)
-            filename = f"{filename_base}_{density_name}_{size}px.png"
-            output_path = output_dir / filename
-            
-            # Convert SVG to PNG
-            png_data = cairosvg.svg2png(
-                bytestring=svg_content.encode('utf-8'),
-                output_width=size,
-                output_height=size
-            )
-            
-            # Save PNG file
-            with open(output_path, 'wb') as f:
-                f.write(png_data)
-            
+        for (density_name, multiplier, size, filename, output_path), file_size in zip(outputs, file_sizes):
             results.append({
                 "filename": filename,
                 "density": density_name,
                 "size": size,
                 "multiplier": multiplier,
-                "file_size": len(png_data),
+                "file_size": file_size,
                 "path": str(output_path)
             })
-            
-    except ImportError:
+    else:
         # Fallback: Use PIL with embedded SVG (limited functionality)
-        results = []
-        for density_name, multiplier in densities.items():
-            size = int(base_size * multiplier)
-            filename = f"{filename_base}_{density_name}_{size}px.png"
-            
+        for density_name, multiplier, size, filename, output_path in outputs:
             # Create a simple placeholder (SVG rendering requires additional libraries)
             img = Image.new('RGBA', (size, size), (200, 200, 200, 128))
             draw = ImageDraw.Draw(img)
             draw.text((size//4, size//2), f"SVG\n{size}px", fill=(100, 100, 100, 255))
             
-            output_path = output_dir / filename
-            img.save(output_path, 'PNG')
+            img.save(output_path, 'PNG', compress_level=PLACEHOLDER_PNG_COMPRESS_LEVEL)
             
             results.append({
                 "filename": filename,
@@ -299,6 +290,10 @@ def generate_app_icons(svg_content: str, output_dir: Path, app_name: str) -> Dic
     
     output_dir.mkdir(parents=True, exist_ok=True)
     
+    # Collect every icon of every platform first so they can all be
+    # rendered by one shared worker pool: (platform, path, placeholder color, details)
+    icons = []
+    
     # iOS Icons
     ios_dir = output_dir / "ios"
     ios_dir.mkdir(exist_ok=True)
@@ -309,41 +304,12 @@ def generate_app_icons(svg_content: str, output_dir: Path, app_name: str) -> Dic
             size = int(base_size * scale)
             scale_suffix = f"@{scale}x" if scale > 1 else ""
             filename = f"{app_name}_{icon_type}_{size}px{scale_suffix}.png"
-            
-            try:
-                import cairosvg
-                png_data = cairosvg.svg2png(
-                    bytestring=svg_content.encode('utf-8'),
-                    output_width=size,
-                    output_height=size
-                )
-                
-                output_path = ios_dir / filename
-                with open(output_path, 'wb') as f:
-                    f.write(png_data)
-                
-                results["ios"].append({
-                    "filename": filename,
-                    "type": icon_type,
-                    "size": size,
-                    "scale": scale,
-                    "file_size": len(png_data)
-                })
-                
-            except ImportError:
-                # Placeholder
-                img = Image.new('RGBA', (size, size), (70, 130, 180, 255))
-                output_path = ios_dir / filename
-                img.save(output_path, 'PNG')
-                
-                results["ios"].append({
-                    "filename": filename,
-                    "type": icon_type,
-                    "size": size,
-                    "scale": scale,
-                    "file_size": output_path.stat().st_size,
-                    "note": "Placeholder - install cairosvg for actual SVG rendering"
-                })
+            icons.append(("ios", ios_dir / filename, (70, 130, 180, 255), {
+                "filename": filename,
+                "type": icon_type,
+                "size": size,
+                "scale": scale
+            }))
     
     # Android Icons  
     android_dir = output_dir / "android"
@@ -351,39 +317,11 @@ def generate_app_icons(svg_content: str, output_dir: Path, app_name: str) -> Dic
     
     for density, size in ANDROID_ICON_SIZES.items():
         filename = f"{app_name}_android_{density}_{size}px.png"
-        
-        try:
-            import cairosvg
-            png_data = cairosvg.svg2png(
-                bytestring=svg_content.encode('utf-8'),
-                output_width=size,
-                output_height=size
-            )
-            
-            output_path = android_dir / filename
-            with open(output_path, 'wb') as f:
-                f.write(png_data)
-            
-            results["android"].append({
-                "filename": filename,
-                "density": density,
-                "size": size,
-                "file_size": len(png_data)
-            })
-            
-        except ImportError:
-            # Placeholder
-            img = Image.new('RGBA', (size, size), (60, 179, 113, 255))
-            output_path = android_dir / filename
-            img.save(output_path, 'PNG')
-            
-            results["android"].append({
-                "filename": filename,
-                "density": density,
-                "size": size,
-                "file_size": output_path.stat().st_size,
-                "note": "Placeholder - install cairosvg for actual SVG rendering"
-            })
+        icons.append(("android", android_dir / filename, (60, 179, 113, 255), {
+            "filename": filename,
+            "density": density,
+            "size": size
+        }))
     
     # Flutter Icons
     flutter_dir = output_dir / "flutter"
@@ -391,39 +329,29 @@ def generate_app_icons(svg_content: str, output_dir: Path, app_name: str) -> Dic
     
     for icon_type, size in FLUTTER_ICON_SIZES.items():
         filename = f"{app_name}_flutter_{icon_type}_{size}px.png"
+        icons.append(("flutter", flutter_dir / filename, (138, 43, 226, 255), {
+            "filename": filename,
+            "type": icon_type,
+            "size": size
+        }))
+    
+    if _CAN_RASTERIZE:
+        tasks = [(details["size"], output_path) for _, output_path, _, details in icons]
+        file_sizes = _render_pngs(svg_content.encode('utf-8'), tasks)
         
-        try:
-            import cairosvg
-            png_data = cairosvg.svg2png(
-                bytestring=svg_content.encode('utf-8'),
-                output_width=size,
-                output_height=size
-            )
-            
-            output_path = flutter_dir / filename
-            with open(output_path, 'wb') as f:
-                f.write(png_data)
+        for (platform, _, _, details), file_size in zip(icons, file_sizes):
+            details["file_size"] = file_size
+            results[platform].append(details)
+    else:
+        # Placeholder
+        for platform, output_path, color, details in icons:
+            size = details["size"]
+            img = Image.new('RGBA', (size, size), color)
+            img.save(output_path, 'PNG', compress_level=PLACEHOLDER_PNG_COMPRESS_LEVEL)
             
-            results["flutter"].append({
-                "filename": filename,
-                "type": icon_type,
-                "size": size,
-                "file_size": len(png_data)
-            })
-            
-        except ImportError:
-            # Placeholder
-            img = Image.new('RGBA', (size, size), (138, 43, 226, 255))
-            output_path = flutter_dir / filename
-            img.save(output_path, 'PNG')
-            
-            results["flutter"].append({
-                "filename": filename,
-                "type": icon_type,
-                "size": size,
-                "file_size": output_path.stat().st_size,
-                "note": "Placeholder - install cairosvg for actual SVG rendering"
-            })
+            details["file_size"] = output_path.stat().st_size
+            details["note"] = "Placeholder - install cairosvg for actual SVG rendering"
+            results[platform].append(details)
     
     return results
 
@@ -442,103 +370,40 @@ def generate_color_variants(svg_content: str, color_schemes: Dict[str, Dict[str,
     variants = {}
     
     for scheme_name, color_map in color_schemes.items():
-        variant_svg = svg_content
+        # Skip the scan entirely when none of the scheme's colors occur
+        if not any(color in svg_content for color in color_map):
+            variants[scheme_name] = svg_content
+            continue
         
-        for old_color, new_color in color_map.items():
-            # Replace color values (supports hex, rgb, named colors)
-            patterns = [
-                f'fill="{old_color}"',
-                f'stroke="{old_color}"',
-                f'stop-color="{old_color}"',
-                f'fill:{old_color}',
-                f'stroke:{old_color}'
-            ]
-            
-            for pattern in patterns:
-                replacement = pattern.replace(old_color, new_color)
-                variant_svg = variant_svg.replace(pattern, replacement)
+        # Replace color values (supports hex, rgb, named colors) in one scan
+        def swap_color(match, color_map=color_map):
+            prefix = match.group(1) or match.group(3)
+            color = match.group(2) if match.group(1) else match.group(4)
+            new_color = color_map.get(color)
+            return match.group(0) if new_color is None else prefix + new_color
         
-        variants[scheme_name] = variant_svg
+        variants[scheme_name] = _COLOR_REF_RE.sub(swap_color, svg_content)
     
     return variants
 
 
-def analyze_svg_complexity(svg_content: str) -> Dict[str, Union[int, float, List[str]]]:
+def analyze_svg_complexity(svg_content: Union[str, bytes, IO]) -> Dict[str, Union[int, float, List[str]]]:
     """
     Analyze SVG complexity and performance characteristics.
     
     Args:
-        svg_content: SVG content as string
+        svg_content: SVG content as string or bytes, or a file-like object
+            which is parsed incrementally without reading it into memory
         
     Returns:
         dict: Complexity analysis results
     """
     try:
-        root = ET.fromstring(svg_content)
-        
-        # Count elements
-        all_elements = root.findall(".//*")
-        element_counts = {}
-        
-        for elem in all_elements:
-            tag = elem.tag.split('}')[-1] if '}' in elem.tag else elem.tag
-            element_counts[tag] = element_counts.get(tag, 0) + 1
-        
-        # Analyze paths
-        paths = []
-        for elem in root.iter():
-            if elem.tag.endswith('path'):
-                paths.append(elem)
-        total_path_commands = 0
-        complex_paths = 0
-        
-        for path in paths:
-            d_attr = path.get('d', '')
-            commands = len(re.findall(r'[MmLlHhVvCcSsQqTtAaZz]', d_attr))
-            total_path_commands += commands
-            if commands > 20:
-                complex_paths += 1
-        
-        # Performance indicators
-        performance_issues = []
-        
-        if len(all_elements) > 100:
-            performance_issues.append(f"Many elements ({len(all_elements)}) - consider simplification")
-        
-        if complex_paths > 0:
-            performance_issues.append(f"{complex_paths} complex paths detected")
-        
-        if element_counts.get('gradient', 0) + element_counts.get('linearGradient', 0) + element_counts.get('radialGradient', 0) > 5:
-            performance_issues.append("Many gradients - may impact rendering performance")
-        
-        if 'filter' in element_counts:
-            performance_issues.append("Contains filters - check mobile compatibility")
-        
-        # Complexity score (0-100, lower is simpler)
-        complexity_score = min(100, (
-            len(all_elements) * 0.5 +
-            total_path_commands * 0.1 +
-            element_counts.get('gradient', 0) * 2 +
-            element_counts.get('filter', 0) * 5
-        ))
-        
-        return {
-            "total_elements": len(all_elements),
-            "element_counts": element_counts,
-            "path_count": len(paths),
-            "total_path_commands": total_path_commands,
-            "complex_paths": complex_paths,
-            "complexity_score": complexity_score,
-            "performance_issues": performance_issues,
-            "file_size": len(svg_content)
-        }
-        
+        state = _load_state(svg_content)
     except ET.ParseError:
-        return {
-            "error": "Invalid SVG format",
-            "complexity_score": 100,
-            "performance_issues": ["Cannot parse SVG"]
-        }
+        return _complexity_parse_error()
+    
+    return _complexity_from_state(state)
 
 
 def generate_svg_report(svg_content: str, filename: str) -> Dict:
@@ -552,9 +417,16 @@ def generate_svg_report(svg_content: str, filename: str) -> Dict:
     Returns:
         dict: Complete analysis report
     """
-    validation = validate_svg(svg_content)
+    # Parse once and derive both validation and complexity from that pass
+    try:
+        state = _parse_once(svg_content)
+    except ET.ParseError as e:
+        validation = {"valid": False, "issues": [f"XML parsing error: {str(e)}"]}
+        complexity = _complexity_parse_error()
+    else:
+        validation = _validate_from_state(state)
+        complexity = _complexity_from_state(state)
     optimization = optimize_svg(svg_content, aggressive=False)
-    complexity = analyze_svg_complexity(svg_content)
     
     # Mobile compatibility assessment
     mobile_compatible = True
@@ -585,6 +457,233 @@ def generate_svg_report(svg_content: str, filename: str) -> Dict:
     }
 
 
+def _load_state(svg_source: Union[str, bytes, IO]) -> _SvgState:
+    """Parse SVG given as a string, bytes or file-like object; strings are cached."""
+    if isinstance(svg_source, str):
+        return _parse_once(svg_source)
+    return _scan_svg(_as_stream(svg_source))
+
+
+def _as_stream(svg_source: Union[bytes, IO]) -> IO:
+    """Wrap raw bytes in a stream; file-like objects are returned as-is."""
+    if isinstance(svg_source, (bytes, bytearray)):
+        return io.BytesIO(svg_source)
+    return svg_source
+
+
+def _parse_once(svg_content: str) -> _SvgState:
+    """
+    Scan an SVG string, caching the result so validating and analyzing the
+    same content again skips the parse.
+    
+    The cache is keyed on a digest of the content rather than the content
+    itself, so cached entries never keep uploaded documents alive.
+    """
+    key = hashlib.blake2b(svg_content.encode('utf-8'), digest_size=16).digest()
+    with _parse_cache_lock:
+        state = _parse_cache.get(key)
+        if state is not None:
+            _parse_cache.move_to_end(key)
+            return state
+    
+    # Parse outside the lock; malformed SVG raises and is not cached
+    state = _scan_svg(io.StringIO(svg_content))
+    with _parse_cache_lock:
+        _parse_cache[key] = state
+        _parse_cache.move_to_end(key)
+        if len(_parse_cache) > SVG_PARSE_CACHE_SIZE:
+            _parse_cache.popitem(last=False)
+    return state
+
+
+class _ScanningReader:
+    """File-like wrapper that measures the document and looks for data URIs as it is read."""
+    
+    def __init__(self, stream: IO):
+        self._stream = stream
+        self._tail = None
+        self.size = 0
+        self.has_data_uri = False
+    
+    def read(self, size: int = -1):
+        chunk = self._stream.read(size)
+        self.size += len(chunk)
+        if chunk and not self.has_data_uri:
+            # Keep the end of everything read so far, not just of this chunk, so a
+            # marker split across several short reads is still found
+            marker = b'data:' if isinstance(chunk, bytes) else 'data:'
+            window = chunk if self._tail is None else self._tail + chunk
+            self.has_data_uri = marker in window
+            self._tail = window[-(len(marker) - 1):]
+        return chunk
+
+
+def _scan_svg(stream: IO) -> _SvgState:
+    """
+    Collect validation and complexity statistics in one streaming parse.
+    
+    Elements are released as soon as they have been inspected; only the
+    root attributes are kept, so memory stays bounded by document depth.
+    Raises ET.ParseError for malformed SVG.
+    """
+    reader = _ScanningReader(stream)
+    root_tag = None
+    has_viewbox = has_width = has_height = False
+    title_found = False
+    desc_found = False
+    gradients_count = 0
+    filters_count = 0
+    element_counts = {}
+    total_elements = 0
+    path_count = 0
+    total_path_commands = 0
+    complex_paths = 0
+    
+    for event, elem in ET.iterparse(reader, events=('start', 'end')):
+        if event == 'end':
+            elem.clear()
+            continue
+        
+        tag = elem.tag
+        if root_tag is None:
+            root_tag = tag
+            has_viewbox = 'viewBox' in elem.attrib
+            has_width = 'width' in elem.attrib
+            has_height = 'height' in elem.attrib
+        else:
+            # The root itself is not counted
+            total_elements += 1
+            local_tag = tag.split('}')[-1] if '}' in tag else tag
+            element_counts[local_tag] = element_counts.get(local_tag, 0) + 1
+        
+        if tag.endswith('title'):
+            title_found = True
+        elif tag.endswith('desc'):
+            desc_found = True
+        elif tag.endswith('linearGradient') or tag.endswith('radialGradient'):
+            gradients_count += 1
+        elif tag.endswith('filter'):
+            filters_count += 1
+        
+        if tag.endswith('path'):
+            path_count += 1
+            path_data = elem.get('d', '')
+            commands = len(path_data) - len(path_data.translate(_PATH_COMMAND_DELETE))
+            total_path_commands += commands
+            if commands > 20:
+                complex_paths += 1
+    
+    return _SvgState(
+        root_tag, has_viewbox, has_width, has_height,
+        title_found, desc_found, gradients_count, filters_count,
+        total_elements, element_counts,
+        path_count, total_path_commands, complex_paths,
+        reader.size, reader.has_data_uri
+    )
+
+
+def _validate_from_state(state: _SvgState) -> Dict[str, Union[bool, List[str]]]:
+    """Build the validate_svg result from a parsed document state."""
+    issues = []
+    
+    # Check for SVG namespace
+    if not state.root_tag.endswith('svg'):
+        issues.append("Root element is not <svg>")
+        
+    # Check for viewBox
+    if not state.has_viewbox:
+        issues.append("Missing viewBox attribute (recommended for scalability)")
+        
+    # Check for width/height
+    if not state.has_width or not state.has_height:
+        issues.append("Missing width or height attributes")
+        
+    # Check for accessibility
+    if not state.title_found and not state.desc_found:
+        issues.append("Missing accessibility elements (title or desc)")
+        
+    # Check for embedded content
+    if state.has_data_uri:
+        issues.append("Contains embedded images (may increase file size)")
+        
+    # Check for complex gradients/filters
+    if state.gradients_count > 5:
+        issues.append(f"Many gradients ({state.gradients_count}) may impact performance")
+    if state.filters_count > 0:
+        issues.append(f"Contains filters ({state.filters_count}) - check mobile compatibility")
+    
+    return {
+        "valid": len(issues) == 0,
+        "issues": issues,
+        "elements_count": state.total_elements,
+        "has_viewbox": state.has_viewbox,
+        "has_dimensions": state.has_width and state.has_height
+    }
+
+
+def _complexity_from_state(state: _SvgState) -> Dict[str, Union[int, float, List[str]]]:
+    """Build the analyze_svg_complexity result from a parsed document state."""
+    element_counts = state.element_counts
+    total_elements = state.total_elements
+    
+    # Performance indicators
+    performance_issues = []
+    
+    if total_elements > 100:
+        performance_issues.append(f"Many elements ({total_elements}) - consider simplification")
+    
+    if state.complex_paths > 0:
+        performance_issues.append(f"{state.complex_paths} complex paths detected")
+    
+    if element_counts.get('gradient', 0) + element_counts.get('linearGradient', 0) + element_counts.get('radialGradient', 0) > 5:
+        performance_issues.append("Many gradients - may impact rendering performance")
+    
+    if 'filter' in element_counts:
+        performance_issues.append("Contains filters - check mobile compatibility")
+    
+    # Complexity score (0-100, lower is simpler)
+    complexity_score = min(100, (
+        total_elements * 0.5 +
+        state.total_path_commands * 0.1 +
+        element_counts.get('gradient', 0) * 2 +
+        element_counts.get('filter', 0) * 5
+    ))
+    
+    return {
+        "total_elements": total_elements,
+        "element_counts": dict(element_counts),  # the state is cached; hand out a copy
+        "path_count": state.path_count,
+        "total_path_commands": state.total_path_commands,
+        "complex_paths": state.complex_paths,
+        "complexity_score": complexity_score,
+        "performance_issues": performance_issues,
+        "file_size": state.size
+    }
+
+
+def _reduce_precision(match: re.Match) -> str:
+    """
+    Round a long decimal match to two places.
+    
+    When the third decimal digit rounds down the result is just a slice of
+    the matched text; only round-up cases go through float formatting.
+    """
+    text = match.group()
+    dot = text.index('.')
+    if text[dot + 3] < '5':
+        return text[:dot + 3]
+    return f"{float(text):.2f}"
+
+
+def _complexity_parse_error() -> Dict[str, Union[int, str, List[str]]]:
+    """Result returned by analyze_svg_complexity for unparseable SVG."""
+    return {
+        "error": "Invalid SVG format",
+        "complexity_score": 100,
+        "performance_issues": ["Cannot parse SVG"]
+    }
+
+
 def _generate_recommendations(validation: Dict, complexity: Dict, file_size: int) -> List[str]:
     """Generate optimization recommendations based on analysis."""
     recommendations = []
@@ -611,3 +710,41 @@ def _generate_recommendations(validation: Dict, complexity: Dict, file_size: int
         recommendations.append("SVG is well-optimized for mobile use")
     
     return recommendations
+
+
+def _render_pngs(svg_bytes: bytes, tasks: List[Tuple[int, Path]]) -> List[int]:
+    """
+    Rasterize SVG bytes to square PNG files concurrently.
+    
+    Uses resvg when resvg_py is installed and falls back to cairosvg;
+    callers check _CAN_RASTERIZE first. Both renderers release
+    the GIL, so independent sizes run in parallel on a thread pool. With
+    cairosvg each worker parses the SVG into a Tree once and reuses it for
+    every size it renders; trees are kept per thread because rendering may
+    mutate nodes. Returns the PNG byte size of each task, in order.
+    """
+    if _resvg is not None:
+        svg_string = svg_bytes.decode('utf-8')
+        
+        def rasterize(size):
+            return bytes(_resvg.svg_to_bytes(svg_string=svg_string, width=size, height=size))
+    else:
+        local = threading.local()
+        
+        def rasterize(size):
+            tree = getattr(local, 'tree', None)
+            if tree is None:
+                tree = local.tree = cairosvg.parser.Tree(bytestring=svg_bytes)
+            output = io.BytesIO()
+            cairosvg.surface.PNGSurface(tree, output, 96, output_width=size, output_height=size).finish()
+            return output.getvalue()
+    
+    def render(task):
+        size, output_path = task
+        png_data = rasterize(size)
+        with open(output_path, 'wb') as f:
+            f.write(png_data)
+        return len(png_data)
+    
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        return list(executor.map(render, tasks))
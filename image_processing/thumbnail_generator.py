@@ -1,6 +1,8 @@
 """
 Thumbnail generation utilities
 """
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from PIL import Image, ImageOps
 from .webp_converter import sanitize_filename
@@ -25,6 +27,29 @@ CROP_METHODS = {
     "right": "right"
 }
 
+# Where each crop method places the square, as (x, y) offsets measured in
+# halves of the leftover width/height: 0 = start, 1 = middle, 2 = end
+_CROP_ANCHORS = {
+    "center": (1, 1),
+    "top": (1, 0),
+    "bottom": (1, 2),
+    "left": (0, 1),
+    "right": (2, 1)
+}
+
+_THUMBNAIL_CSS_TEMPLATE = """.thumbnail-{size_name} {{
+    width: {width}px;
+    height: {height}px;
+    object-fit: cover;
+    border-radius: 8px;
+    box-shadow: 0 2px 8px rgba(0, 0, 0, 0.1);
+}}
+
+.thumbnail-{size_name}:hover {{
+    transform: scale(1.05);
+    transition: transform 0.2s ease;
+}}"""
+
 
 def generate_thumbnails(file_storage, out_dir: Path, quality: int, lossless: bool, 
                        selected_sizes: list, crop_method: str, output_format: str):
@@ -37,82 +62,102 @@ def generate_thumbnails(file_storage, out_dir: Path, quality: int, lossless: boo
     base_filename = sanitize_filename(file_storage.filename)
     out_dir.mkdir(parents=True, exist_ok=True)
     
-    results = []
     format_info = WEB_FORMATS[output_format]
     
     with Image.open(file_storage.stream) as im:
         # Fix rotation according to EXIF
         im = ImageOps.exif_transpose(im)
-        original_width, original_height = im.size
         
-        for size_name in selected_sizes:
-            if size_name not in THUMBNAIL_SIZES:
-                continue
-                
-            target_size = THUMBNAIL_SIZES[size_name]
-            target_width, target_height = target_size
-            
-            # Create square thumbnail with cropping
-            thumbnail = create_square_thumbnail(im, target_width, crop_method)
+        # Crop once at native resolution and derive each size from the next
+        # larger thumbnail, so the expensive resample over the full crop only
+        # happens for the largest requested size
+        cropped = _crop_square(im, crop_method)
+        valid_sizes = [size_name for size_name in dict.fromkeys(selected_sizes) if size_name in THUMBNAIL_SIZES]
+        thumbnails = {}
+        previous = None
+        for size_name in sorted(valid_sizes, key=lambda name: THUMBNAIL_SIZES[name][0], reverse=True):
+            size = THUMBNAIL_SIZES[size_name][0]
+            source = previous if previous is not None and previous.width <= cropped.width else cropped
+            thumbnails[size_name] = previous = _resize_square(source, size)
+        
+        def save_thumbnail(size_name):
+            target_width, target_height = THUMBNAIL_SIZES[size_name]
+            thumbnail = thumbnails[size_name]
             
             # Convert for target format
             converted_thumbnail = _convert_for_format(thumbnail, output_format, quality, lossless)
             
             # Generate filename with size and crop info
-            filename = f"{base_filename}-thumb-{size_name}-{target_width}x{target_height}-{crop_method}{format_info['ext']}"
+            filename = f"{base_filename}-thumb-{size_name}-{target_width}x{target_height}-{crop_method}{format_info.ext}"
             out_path = out_dir / filename
             
             # Save thumbnail using the universal save function
             _save_image(converted_thumbnail, out_path, output_format, quality, lossless)
             
-            results.append({
+            return {
                 "name": filename,
                 "size_kb": round(out_path.stat().st_size / 1024, 1),
                 "dimensions": f"{target_width}x{target_height}",
+                "width": target_width,
+                "height": target_height,
                 "size_name": size_name,
                 "crop_method": crop_method,
-                "format": format_info["name"]
-            })
+                "format": format_info.name
+            }
+        
+        # Each size encodes independently and PIL releases the GIL while
+        # encoding, so convert and save them on a thread pool
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            results = list(executor.map(save_thumbnail, valid_sizes))
     
     return results
 
 
 def create_square_thumbnail(image, size, crop_method):
     """Create a square thumbnail using the specified crop method"""
+    cropped = _crop_square(image, crop_method)
+    
+    # Resize to target size
+    thumbnail = _resize_square(cropped, size)
+    
+    return thumbnail
+
+
+def _resize_square(image, size):
+    """Resize a square image, box-reducing large sources before the final Lanczos pass"""
+    # Image.reduce averages whole pixel blocks and is much cheaper than Lanczos
+    # over the full source; stop at twice the target so Lanczos still does the
+    # last step and keeps the result sharp
+    factor = image.width // (size * 2)
+    if factor >= 2:
+        image = image.reduce(factor)
+    return image.resize((size, size), Image.Resampling.LANCZOS)
+
+
+def _crop_square(image, crop_method):
+    """Crop the largest square from the image using the specified crop method"""
     original_width, original_height = image.size
     
     # Calculate the size for cropping to square
     crop_size = min(original_width, original_height)
     
-    # Calculate crop box based on method
-    if crop_method == "center":
-        left = (original_width - crop_size) // 2
-        top = (original_height - crop_size) // 2
-    elif crop_method == "top":
-        left = (original_width - crop_size) // 2
-        top = 0
-    elif crop_method == "bottom":
-        left = (original_width - crop_size) // 2
-        top = original_height - crop_size
-    elif crop_method == "left":
-        left = 0
-        top = (original_height - crop_size) // 2
-    elif crop_method == "right":
-        left = original_width - crop_size
-        top = (original_height - crop_size) // 2
-    else:  # Default to center
-        left = (original_width - crop_size) // 2
-        top = (original_height - crop_size) // 2
+    # Look up the crop position; unknown methods default to center
+    anchor_x, anchor_y = _CROP_ANCHORS.get(crop_method, _CROP_ANCHORS["center"])
+    left = (original_width - crop_size) * anchor_x // 2
+    top = (original_height - crop_size) * anchor_y // 2
     
     # Crop to square
     right = left + crop_size
     bottom = top + crop_size
-    cropped = image.crop((left, top, right, bottom))
-    
-    # Resize to target size
-    thumbnail = cropped.resize((size, size), Image.Resampling.LANCZOS)
-    
-    return thumbnail
+    return image.crop((left, top, right, bottom))
+
+
+def _item_dimensions(item):
+    """Width and height of a result item, parsed from its dimensions string for older results"""
+    if "width" in item and "height" in item:
+        return item["width"], item["height"]
+    width, height = item["dimensions"].split("x")
+    return int(width), int(height)
 
 
 def generate_thumbnail_css(results):
@@ -133,22 +178,8 @@ def generate_thumbnail_css(results):
     # Generate CSS for each size
     for size_name, items in sizes.items():
         if items:
-            dimensions = items[0]["dimensions"]
-            width, height = dimensions.split("x")
-            
-            css = f""".thumbnail-{size_name} {{
-    width: {width}px;
-    height: {height}px;
-    object-fit: cover;
-    border-radius: 8px;
-    box-shadow: 0 2px 8px rgba(0, 0, 0, 0.1);
-}}
-
-.thumbnail-{size_name}:hover {{
-    transform: scale(1.05);
-    transition: transform 0.2s ease;
-}}"""
-            css_examples.append(css)
+            width, height = _item_dimensions(items[0])
+            css_examples.append(_THUMBNAIL_CSS_TEMPLATE.format(size_name=size_name, width=width, height=height))
     
     return css_examples
 
@@ -1,9 +1,14 @@
 """
 Shared utilities for image processing modules
 """
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
+import PIL
+
 # Constants
 MAX_FILENAME_LENGTH = 100
 BYTES_PER_KB = 1024
@@ -11,8 +16,20 @@ BYTES_PER_MB = 1024 * 1024
 BYTES_PER_GB = 1024 * 1024 * 1024
 WHITE_RGB = (255, 255, 255)
 DEFAULT_IMAGE_NAME = "image"
+SANITIZE_CACHE_SIZE = 4096
+
+# Largest downscale step a resize cascade takes from the previous (larger)
+# output; bigger jumps resample the source again to keep the result sharp
+MAX_CASCADE_RATIO = 2.5
+
+_UNSAFE_FILENAME_CHARS_RE = re.compile(r"[^A-Za-z0-9._-]+")
 
+# Unit suffixes and divisors indexed by power of 1024
+_SIZE_UNITS = ("B", "KB", "MB", "GB")
+_SIZE_DIVISORS = (1, BYTES_PER_KB, BYTES_PER_MB, BYTES_PER_GB)
 
+
+@lru_cache(maxsize=SANITIZE_CACHE_SIZE)
 def sanitize_filename(name: str) -> str:
     """
     Clean filename by removing special characters and ensuring safe naming.
@@ -30,7 +47,7 @@ def sanitize_filename(name: str) -> str:
     name = Path(name).stem
     
     # Replace problematic characters with underscores
-    name = re.sub(r"[^A-Za-z0-9._-]+", "_", name).strip("._-")
+    name = _UNSAFE_FILENAME_CHARS_RE.sub("_", name).strip("._-")
     
     # Ensure we have a valid name
     if not name:
@@ -74,12 +91,9 @@ def bytes_to_human_readable(size_bytes: int) -> str:
     """
     if size_bytes < BYTES_PER_KB:
         return f"{size_bytes} B"
-    elif size_bytes < BYTES_PER_MB:
-        return f"{size_bytes / BYTES_PER_KB:.1f} KB"
-    elif size_bytes < BYTES_PER_GB:
-        return f"{size_bytes / BYTES_PER_MB:.1f} MB"
-    else:
-        return f"{size_bytes / BYTES_PER_GB:.1f} GB"
+    # Each unit spans 10 bits, so the bit length picks the unit directly
+    unit = min(3, (int(size_bytes).bit_length() - 1) // 10)
+    return f"{size_bytes / _SIZE_DIVISORS[unit]:.1f} {_SIZE_UNITS[unit]}"
 
 
 def calculate_compression_ratio(original_size: int, compressed_size: int) -> float:
@@ -97,3 +111,51 @@ def calculate_compression_ratio(original_size: int, compressed_size: int) -> flo
         return 0.0
         
     return ((original_size - compressed_size) / original_size) * 100
+
+
+def is_pillow_simd() -> bool:
+    """
+    Check whether the installed Pillow is the Pillow-SIMD fork.
+    
+    Returns:
+        bool: True when PIL reports a Pillow-SIMD version (e.g. "9.5.0.post1")
+    """
+    return ".post" in PIL.__version__
+
+
+def parallel_map(func, items, group_key=None) -> list:
+    """
+    Apply func to every item on a thread pool, returning results in input order.
+    
+    PIL releases the GIL while decoding, resizing and encoding, so image work
+    on independent items runs in parallel. Items sharing a group_key, such as
+    uploads that would write the same output file, run on one worker in input
+    order, so the last one still wins as it would in a serial loop.
+    
+    Args:
+        func: Function called with each item
+        items: Items to process
+        group_key: Optional function mapping an item to its group
+        
+    Returns:
+        list: func's result for each item, in the order of items
+    """
+    items = list(items)
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        if group_key is None:
+            return list(executor.map(func, items))
+        
+        groups = {}
+        for index, item in enumerate(items):
+            groups.setdefault(group_key(item), []).append(index)
+        
+        results = [None] * len(items)
+        
+        def run_group(indices):
+            for index in indices:
+                results[index] = func(items[index])
+        
+        # Consume the map so an exception raised by func propagates
+        for _ in executor.map(run_group, groups.values()):
+            pass
+        return results
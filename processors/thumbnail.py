@@ -2,7 +2,7 @@
 Thumbnail Generation Functions
 """
 from pathlib import Path
-from PIL import Image, ImageOps
+from PIL import Image, ImageFilter, ImageOps
 from .webp_converter import sanitize_filename
 
 # Common thumbnail sizes
@@ -22,6 +22,9 @@ CROP_METHODS = {
     "bottom": "bottom"
 }
 
+# Longest side of the downsampled copy used to find detail for smart crops
+SMART_CROP_ANALYSIS_SIZE = 64
+
 
 def generate_thumbnails(file_storage, out_dir: Path, quality: int, lossless: bool, 
                        selected_sizes: list, crop_method: str = "center", 
@@ -37,15 +40,24 @@ def generate_thumbnails(file_storage, out_dir: Path, quality: int, lossless: boo
         im = ImageOps.exif_transpose(im)
         original_width, original_height = im.size
         
-        for size_name in selected_sizes:
-            if size_name not in THUMBNAIL_SIZES:
-                continue
-                
+        # The crop is the same for every size of a given aspect ratio, so fit
+        # the largest size from the source once and derive the smaller sizes
+        # of that aspect from the previous result
+        valid_sizes = [size_name for size_name in selected_sizes if size_name in THUMBNAIL_SIZES]
+        thumbnails = {}
+        previous = None
+        for size_name in sorted(set(valid_sizes), key=lambda name: THUMBNAIL_SIZES[name][0], reverse=True):
+            target_width, target_height = target_size = THUMBNAIL_SIZES[size_name]
+            if previous is not None and previous.width * target_height == previous.height * target_width:
+                thumbnails[size_name] = previous.resize(target_size, Image.Resampling.LANCZOS)
+            else:
+                thumbnails[size_name] = create_thumbnail(im, target_size, crop_method)
+            previous = thumbnails[size_name]
+        
+        for size_name in valid_sizes:
             target_size = THUMBNAIL_SIZES[size_name]
             target_width, target_height = target_size
-            
-            # Create thumbnail with different cropping methods
-            thumbnail = create_thumbnail(im, target_size, crop_method)
+            thumbnail = thumbnails[size_name]
             
             # Generate filename with size suffix
             extension = "webp" if format_type == "webp" else "jpg"
@@ -63,10 +75,13 @@ def generate_thumbnails(file_storage, out_dir: Path, quality: int, lossless: boo
                         thumbnail = thumbnail.convert("RGBA" if "A" in thumbnail.getbands() else "RGB")
                     thumbnail.save(out_path, format="WEBP", quality=quality, method=6)
             else:  # JPEG
-                if thumbnail.mode in ("RGBA", "LA"):
+                if thumbnail.mode == "RGBA" and thumbnail.getextrema()[3][0] == 255:
+                    # Fully opaque, no compositing needed
+                    thumbnail = thumbnail.convert("RGB")
+                elif thumbnail.mode in ("RGBA", "LA"):
                     # Convert to RGB for JPEG (no alpha support)
                     background = Image.new("RGB", thumbnail.size, (255, 255, 255))
-                    background.paste(thumbnail, mask=thumbnail.split()[-1] if thumbnail.mode == "RGBA" else None)
+                    background.paste(thumbnail, mask=thumbnail if thumbnail.mode == "RGBA" else None)
                     thumbnail = background
                 thumbnail.save(out_path, format="JPEG", quality=quality, optimize=True)
             
@@ -91,9 +106,9 @@ def create_thumbnail(image, target_size, crop_method):
         return ImageOps.fit(image, target_size, Image.Resampling.LANCZOS, centering=(0.5, 0.5))
     
     elif crop_method == "smart":
-        # Smart crop - try to detect interesting content
-        # For now, use center crop with slight bias towards upper portion
-        return ImageOps.fit(image, target_size, Image.Resampling.LANCZOS, centering=(0.5, 0.4))
+        # Smart crop - keep the region with the most detail
+        centering = _smart_crop_centering(image, target_size)
+        return ImageOps.fit(image, target_size, Image.Resampling.LANCZOS, centering=centering)
     
     elif crop_method == "top":
         # Crop from the top
@@ -108,6 +123,50 @@ def create_thumbnail(image, target_size, crop_method):
         return ImageOps.fit(image, target_size, Image.Resampling.LANCZOS, centering=(0.5, 0.5))
 
 
+def _smart_crop_centering(image, target_size):
+    """Find the ImageOps.fit centering whose crop window holds the most edge detail"""
+    target_width, target_height = target_size
+    original_width, original_height = image.size
+    target_ratio = target_width / target_height
+    
+    # The crop keeps the full extent of one axis and slides along the other
+    horizontal = original_width / original_height > target_ratio
+    
+    # Edge energy of a small grayscale copy; the filter leaves the outer
+    # pixels unfiltered, so blank them rather than count raw brightness
+    scale = min(1.0, SMART_CROP_ANALYSIS_SIZE / max(original_width, original_height))
+    small_width = max(3, round(original_width * scale))
+    small_height = max(3, round(original_height * scale))
+    small = image.resize((small_width, small_height), Image.Resampling.BOX).convert("L")
+    edges = ImageOps.expand(ImageOps.crop(small.filter(ImageFilter.FIND_EDGES), 1), border=1, fill=0)
+    
+    # Collapse the energy map to one profile along the sliding axis
+    if horizontal:
+        profile = list(edges.resize((small_width, 1), Image.Resampling.BOX).getdata())
+        window = min(small_width, max(1, round(small_height * target_ratio)))
+    else:
+        profile = list(edges.resize((1, small_height), Image.Resampling.BOX).getdata())
+        window = min(small_height, max(1, round(small_width / target_ratio)))
+    
+    slack = len(profile) - window
+    if slack <= 0:
+        return (0.5, 0.5)
+    
+    # Slide the crop window; ties go to the start closest to the middle so
+    # featureless images still get a centered crop
+    best_start, best_key = 0, None
+    energy = sum(profile[:window])
+    for start in range(slack + 1):
+        if start:
+            energy += profile[start + window - 1] - profile[start - 1]
+        key = (energy, -abs(start - slack / 2))
+        if best_key is None or key > best_key:
+            best_start, best_key = start, key
+    
+    fraction = best_start / slack
+    return (fraction, 0.5) if horizontal else (0.5, fraction)
+
+
 def generate_thumbnail_css(results, base_url="/output/"):
     """Generate CSS examples for using thumbnails"""
     if not results:
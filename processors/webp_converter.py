@@ -2,14 +2,18 @@
 WebP Conversion Functions
 """
 import re
+from functools import lru_cache
 from pathlib import Path
 from PIL import Image, ImageOps
 
+_SANITIZE_RE = re.compile(r"[^A-Za-z0-9._-]+")
 
+
+@lru_cache(maxsize=512)
 def sanitize_filename(name: str) -> str:
     """Clean and sanitize filename"""
     name = Path(name).stem
-    name = re.sub(r"[^A-Za-z0-9._-]+", "_", name).strip("._-")
+    name = _SANITIZE_RE.sub("_", name).strip("._-")
     return name or "image"
 
 
@@ -25,8 +29,8 @@ def save_as_webp(file_storage, out_dir: Path, quality: int, lossless: bool):
         
         # Convert appropriately for WebP
         if lossless:
-            # Keep alpha if present
-            if im.mode not in ("RGBA", "LA"):
+            # Keep alpha if present; the encoder takes RGB as is
+            if im.mode not in ("RGB", "RGBA", "LA"):
                 im = im.convert("RGBA")
             im.save(out_path, format="WEBP", lossless=True, method=6)
         else:
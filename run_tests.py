@@ -1,68 +1,47 @@
 """
 Test runner for the web image converter application
-Run all unit tests and generate a coverage report
+Run all unit tests with pytest, spread across CPU cores when pytest-xdist is installed
 """
-import unittest
+import importlib.util
 import sys
-import os
 from pathlib import Path
 
+import pytest
+
 # Add the project root to the Python path
-project_root = Path(__file__).parent.parent
+project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
+tests_dir = project_root / "tests"
+
+
+def _parallel_args(dist="loadfile"):
+    """pytest arguments that run tests on all cores, if pytest-xdist is available"""
+    if importlib.util.find_spec("xdist") is None:
+        return []
+    # loadfile keeps each module's tests (and their fixtures) on one worker;
+    # a single module is split test by test instead
+    return ["-n", "auto", f"--dist={dist}"]
+
 
 def discover_and_run_tests():
     """Discover and run all tests in the tests directory"""
-    # Discover all test files in the tests directory
-    test_loader = unittest.TestLoader()
-    test_suite = test_loader.discover(
-        start_dir='tests',
-        pattern='test_*.py',
-        top_level_dir=str(project_root)
-    )
-    
-    # Run the tests with verbose output
-    test_runner = unittest.TextTestRunner(verbosity=2, buffer=True)
-    result = test_runner.run(test_suite)
-    
-    # Print summary
-    print(f"\n{'='*60}")
-    print(f"TEST SUMMARY")
-    print(f"{'='*60}")
-    print(f"Tests run: {result.testsRun}")
-    print(f"Failures: {len(result.failures)}")
-    print(f"Errors: {len(result.errors)}")
-    print(f"Skipped: {len(result.skipped) if hasattr(result, 'skipped') else 0}")
-    
-    if result.failures:
-        print(f"\nFAILURES:")
-        for test, traceback in result.failures:
-            print(f"- {test}")
-    
-    if result.errors:
-        print(f"\nERRORS:")
-        for test, traceback in result.errors:
-            print(f"- {test}")
-    
-    # Return True if all tests passed
-    return len(result.failures) == 0 and len(result.errors) == 0
+    # pytest collects the unittest TestCases as well as the pytest-style tests
+    return pytest.main([str(tests_dir), "-v", *_parallel_args()]) == 0
+
 
 def run_specific_test_module(module_name):
     """Run tests from a specific module"""
-    try:
-        test_loader = unittest.TestLoader()
-        test_suite = test_loader.loadTestsFromName(f'tests.{module_name}')
-        test_runner = unittest.TextTestRunner(verbosity=2)
-        result = test_runner.run(test_suite)
-        return len(result.failures) == 0 and len(result.errors) == 0
-    except ImportError as e:
-        print(f"Could not import test module '{module_name}': {e}")
+    test_file = tests_dir / f"{module_name}.py"
+    if not test_file.exists():
+        print(f"Could not find test module '{module_name}'")
         return False
+    return pytest.main([str(test_file), "-v", *_parallel_args(dist="load")]) == 0
+
 
 if __name__ == "__main__":
     print("Web Image Converter - Test Suite")
     print("="*50)
-    
+
     if len(sys.argv) > 1:
         # Run specific test module
         module_name = sys.argv[1]
@@ -72,6 +51,6 @@ if __name__ == "__main__":
         # Run all tests
         print("Running all tests...")
         success = discover_and_run_tests()
-    
+
     # Exit with appropriate code
     sys.exit(0 if success else 1)
@@ -5,7 +5,7 @@ with RGB and HEX values.
 """
 
 import io
-from PIL import Image
+from PIL import Image, ImageDraw
 from werkzeug.datastructures import FileStorage
 from image_processing.image_analysis import analyze_image_comprehensive
 
@@ -13,24 +13,11 @@ def create_test_image():
     """Create a simple test image with distinct colors"""
     # Create a 100x100 image with 4 distinct color blocks
     img = Image.new("RGB", (100, 100))
-    pixels = []
-    
-    for y in range(100):
-        for x in range(100):
-            if x < 50 and y < 50:
-                # Red block
-                pixels.append((255, 0, 0))
-            elif x >= 50 and y < 50:
-                # Green block
-                pixels.append((0, 255, 0))
-            elif x < 50 and y >= 50:
-                # Blue block
-                pixels.append((0, 0, 255))
-            else:
-                # Yellow block
-                pixels.append((255, 255, 0))
-    
-    img.putdata(pixels)
+    draw = ImageDraw.Draw(img)
+    draw.rectangle([0, 0, 49, 49], fill=(255, 0, 0))      # Red
+    draw.rectangle([50, 0, 99, 49], fill=(0, 255, 0))     # Green
+    draw.rectangle([0, 50, 49, 99], fill=(0, 0, 255))     # Blue
+    draw.rectangle([50, 50, 99, 99], fill=(255, 255, 0))  # Yellow
     return img
 
 def main():
@@ -3,15 +3,9 @@ Unit tests for favicon generator
 """
 import unittest
 import tempfile
-import shutil
 from pathlib import Path
 from io import BytesIO
 from PIL import Image
-import sys
-import os
-
-# Add parent directory to path to import our modules
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from image_processing.favicon_generator import (
     generate_favicons,
@@ -21,7 +15,9 @@ from image_processing.favicon_generator import (
     create_multi_ico_favicon,
     get_favicon_purpose,
     FAVICON_SIZES,
-    FAVICON_SPECS
+    FAVICON_SPECS,
+    FAVICON_SPECS_BY_KEY,
+    FaviconSpec
 )
 
 
@@ -29,63 +25,74 @@ class MockFileStorage:
     """Mock file storage object for testing"""
     def __init__(self, filename, image_data):
         self.filename = filename
-        self.stream = BytesIO(image_data)
+        self._data = image_data
+    
+    @property
+    def stream(self):
+        """A fresh stream over the image bytes, so the mock can be reused"""
+        # BytesIO shares an immutable bytes buffer until it is written to
+        return BytesIO(self._data)
 
 
 class TestFaviconGenerator(unittest.TestCase):
     
+    @classmethod
+    def setUpClass(cls):
+        """Create the read-only test images and their encoded bytes once"""
+        # Create test images
+        cls.test_image_square = Image.new("RGB", (256, 256), color="red")
+        cls.test_image_rect = Image.new("RGB", (300, 200), color="green")
+        cls.test_image_rgba = Image.new("RGBA", (128, 128), color=(255, 0, 0, 128))
+        
+        # Save test images to bytes; MockFileStorage wraps them in a fresh
+        # stream for every test
+        cls.square_bytes = cls._image_to_bytes(cls.test_image_square)
+        cls.rect_bytes = cls._image_to_bytes(cls.test_image_rect)
+        cls.rgba_bytes = cls._image_to_bytes(cls.test_image_rgba, "PNG")
+    
     def setUp(self):
         """Set up test fixtures"""
-        self.temp_dir = Path(tempfile.mkdtemp())
-        
-        # Create test images
-        self.test_image_square = Image.new("RGB", (256, 256), color="red")
-        self.test_image_rect = Image.new("RGB", (300, 200), color="green")
-        self.test_image_rgba = Image.new("RGBA", (128, 128), color=(255, 0, 0, 128))
-        
-        # Save test images to bytes
-        self.square_bytes = self._image_to_bytes(self.test_image_square)
-        self.rect_bytes = self._image_to_bytes(self.test_image_rect)
-        self.rgba_bytes = self._image_to_bytes(self.test_image_rgba, "PNG")
+        # Removed again by the cleanup registered here, even if setUp fails later
+        temp_dir = tempfile.TemporaryDirectory(ignore_cleanup_errors=True)
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = Path(temp_dir.name)
     
-    def _image_to_bytes(self, image, format="PNG"):
+    @staticmethod
+    def _image_to_bytes(image, format="PNG"):
         """Convert PIL Image to bytes"""
         bytes_io = BytesIO()
         image.save(bytes_io, format=format)
         bytes_io.seek(0)
         return bytes_io.getvalue()
     
-    def tearDown(self):
-        """Clean up test fixtures"""
-        shutil.rmtree(self.temp_dir, ignore_errors=True)
-    
     def test_favicon_sizes_constant(self):
         """Test that favicon sizes are properly defined"""
         self.assertIsInstance(FAVICON_SIZES, dict)
         
         # Check expected sizes exist
-        expected_sizes = ["ico_16", "ico_32", "ico_48", "png_32", "png_64", "png_128", "png_180", "png_192", "png_512"]
-        for size_key in expected_sizes:
-            self.assertIn(size_key, FAVICON_SIZES)
+        expected_sizes = {"ico_16", "ico_32", "ico_48", "png_32", "png_64", "png_128", "png_180", "png_192", "png_512"}
+        self.assertLessEqual(expected_sizes, set(FAVICON_SIZES))
             
         # Check size format
-        for size_name, dimensions in FAVICON_SIZES.items():
-            self.assertIsInstance(dimensions, tuple)
-            self.assertEqual(len(dimensions), 2)
-            self.assertIsInstance(dimensions[0], int)
-            self.assertIsInstance(dimensions[1], int)
+        self.assertTrue(all(
+            isinstance(dimensions, tuple) and len(dimensions) == 2 and all(isinstance(value, int) for value in dimensions)
+            for dimensions in FAVICON_SIZES.values()
+        ), FAVICON_SIZES)
     
     def test_favicon_specs_constant(self):
         """Test that favicon specs are properly defined"""
-        self.assertIsInstance(FAVICON_SPECS, dict)
+        self.assertIsInstance(FAVICON_SPECS, tuple)
         
         # Each favicon size should have corresponding spec
-        for size_key in FAVICON_SIZES.keys():
-            self.assertIn(size_key, FAVICON_SPECS)
-            spec = FAVICON_SPECS[size_key]
-            self.assertIn("format", spec)
-            self.assertIn("filename", spec)
-            self.assertIn(spec["format"], ["ICO", "PNG"])
+        self.assertEqual(set(FAVICON_SIZES), set(FAVICON_SPECS_BY_KEY))
+        self.assertTrue(all(
+            isinstance(spec, FaviconSpec)
+            and spec.size_key == size_key
+            and (spec.width, spec.height) == FAVICON_SIZES[size_key]
+            and spec.filename
+            and spec.format in ("ICO", "PNG")
+            for size_key, spec in FAVICON_SPECS_BY_KEY.items()
+        ), FAVICON_SPECS)
     
     def test_create_favicon_square_image(self):
         """Test favicon creation with square source image"""
@@ -116,6 +123,16 @@ class TestFaviconGenerator(unittest.TestCase):
         favicon_named = create_favicon(self.test_image_square, (32, 32), "white")
         self.assertEqual(favicon_named.mode, "RGB")
     
+    def test_create_favicon_fast_small_sizes(self):
+        """Test the bilinear fast path for ICO-sized favicons"""
+        for size in [(16, 16), (32, 32), (48, 48), (64, 64)]:
+            favicon = create_favicon(self.test_image_rect, size, "transparent", high_quality=False)
+            self.assertEqual(favicon.size, size)
+        
+        # A solid colour resamples to the same colour with either filter
+        fast = create_favicon(self.test_image_square, (16, 16), "white", high_quality=False)
+        self.assertEqual(fast.getpixel((8, 8)), (255, 0, 0))
+    
     def test_generate_favicons_basic(self):
         """Test basic favicon generation"""
         mock_file = MockFileStorage("logo.png", self.square_bytes)
@@ -197,7 +214,8 @@ class TestFaviconGenerator(unittest.TestCase):
             file_storage=mock_file,
             out_dir=self.temp_dir,
             selected_sizes=all_sizes,
-            background_color="transparent"
+            background_color="transparent",
+            png_compress_level=1  # Only the outputs are checked, not their size
         )
         
         self.assertEqual(len(results), len(all_sizes))
@@ -235,6 +253,36 @@ class TestFaviconGenerator(unittest.TestCase):
             self.assertEqual(img.format, "ICO")
             # ICO files with multiple sizes should be readable
     
+    def test_generate_favicons_with_multi_ico(self):
+        """Test that generate_favicons can also write the multi-size favicon.ico"""
+        mock_file = MockFileStorage("logo.png", self.square_bytes)
+        ico_path = self.temp_dir / "favicon.ico"
+        
+        results = generate_favicons(mock_file, self.temp_dir, ["ico_16", "ico_32"], "white", multi_ico_path=ico_path)
+        
+        self.assertEqual(len(results), 2)
+        with Image.open(ico_path) as img:
+            self.assertEqual(img.format, "ICO")
+            self.assertEqual(img.info["sizes"], {(16, 16), (32, 32), (48, 48)})
+    
+    def test_generate_favicons_reports_multi_ico_failure(self):
+        """Test that a failed favicon.ico is reported without losing the other favicons"""
+        mock_file = MockFileStorage("logo.png", self.square_bytes)
+        ico_path = self.temp_dir / "missing" / "favicon.ico"  # Parent directory does not exist
+        ico_errors = []
+        
+        results = generate_favicons(mock_file, self.temp_dir, ["ico_16", "png_32"], "white",
+                                    multi_ico_path=ico_path, ico_errors=ico_errors)
+        
+        self.assertEqual(len(results), 2)
+        self.assertEqual(len(ico_errors), 1)
+        self.assertEqual(ico_errors[0]["filename"], "logo.png")
+        self.assertFalse(ico_path.exists())
+        
+        # Without an error list the failure is raised as before
+        with self.assertRaises(OSError):
+            generate_favicons(mock_file, self.temp_dir, ["ico_16"], "white", multi_ico_path=ico_path)
+    
     def test_get_favicon_purpose(self):
         """Test favicon purpose descriptions"""
         # Test known size keys
@@ -323,6 +371,34 @@ class TestFaviconGenerator(unittest.TestCase):
         with Image.open(file_path) as img:
             self.assertIn(img.mode, ["RGBA", "LA"])  # Should have alpha channel
     
+    def test_create_favicon_preserves_partial_alpha(self):
+        """Test that semi-transparent pixels keep their colour and alpha"""
+        # Square source fills the favicon, wide source is padded
+        wide_rgba = Image.new("RGBA", (128, 64), color=(255, 0, 0, 128))
+        for source, pixel in [(self.test_image_rgba, (16, 16)), (wide_rgba, (16, 16))]:
+            favicon = create_favicon(source, (32, 32), "transparent")
+            self.assertEqual(favicon.getpixel(pixel), (255, 0, 0, 128))
+        
+        # Padding around a wide source stays fully transparent
+        self.assertEqual(create_favicon(wide_rgba, (32, 32), "transparent").getpixel((16, 2)), (0, 0, 0, 0))
+    
+    def test_create_favicon_blends_alpha_onto_background(self):
+        """Test that transparent pixels take the background colour"""
+        # Square source fills the favicon, wide source is padded
+        wide_rgba = Image.new("RGBA", (128, 64), color=(255, 0, 0, 128))
+        for source in [self.test_image_rgba, wide_rgba]:
+            favicon = create_favicon(source, (32, 32), "#0000ff")
+            self.assertEqual(favicon.mode, "RGB")
+            self.assertEqual(favicon.getpixel((16, 16)), (128, 0, 127))
+        
+        # Generated favicons of an RGB source stay on the RGB path
+        mock_file = MockFileStorage("logo.png", self.rect_bytes)
+        results = generate_favicons(mock_file, self.temp_dir, ["png_64"], "white")
+        with Image.open(self.temp_dir / results[0]["name"]) as img:
+            self.assertEqual(img.mode, "RGB")
+            self.assertEqual(img.getpixel((32, 2)), (255, 255, 255))
+            self.assertEqual(img.getpixel((32, 32)), (0, 128, 0))
+    
     def test_favicon_background_color_application(self):
         """Test that background colors are properly applied"""
         mock_file = MockFileStorage("small_logo.png", self.square_bytes)
@@ -336,7 +412,6 @@ class TestFaviconGenerator(unittest.TestCase):
         )
         
         # Test with hex color background
-        mock_file.stream = BytesIO(self.square_bytes)
         results_hex = generate_favicons(
             file_storage=mock_file,
             out_dir=self.temp_dir / "hex",
@@ -3,10 +3,7 @@ Unit tests for the image_analysis module
 """
 import io
 import pytest
-from PIL import Image
-from pathlib import Path
-import tempfile
-import shutil
+from PIL import Image, ImageDraw
 from werkzeug.datastructures import FileStorage
 
 from image_processing.image_analysis import (
@@ -23,65 +20,122 @@ from image_processing.image_analysis import (
     _generate_batch_insights
 )
 
+# The analysers only need to exercise their code paths, so the samples are kept small
+PHOTO_W, PHOTO_H = 160, 120
+# Formats scored by _get_format_recommendations and estimated by _calculate_web_metrics
+ANALYSIS_FORMATS = ["webp", "jpeg", "png", "avif"]
+# Payload that no image plugin recognises; each test wraps it in a fresh stream
+_INVALID_PNG_BYTES = b"invalid image data"
+
+_REQUIRED_ANALYSIS_KEYS = frozenset({
+    "basic_info", "color_analysis", "complexity_analysis",
+    "format_recommendations", "optimization_suggestions",
+    "web_metrics", "metadata", "filename"
+})
+_REQUIRED_COLOR_KEYS = frozenset({
+    "avg_color_range", "brightness", "unique_colors", "dominant_colors",
+    "color_harmony", "is_monochrome", "is_high_contrast", "color_complexity"
+})
+_REQUIRED_DOMINANT_COLOR_KEYS = frozenset({"rgb", "hex", "color", "count", "percentage"})
+_REQUIRED_COMPLEXITY_KEYS = frozenset({
+    "edge_density", "texture", "detail_level",
+    "is_photo_likely", "is_graphic_likely"
+})
+_REQUIRED_METADATA_SECTIONS = frozenset({"basic", "exif", "camera_info", "location", "technical"})
+
 
 class TestImageAnalysis:
     """Test suite for image_analysis functions"""
     
-    @pytest.fixture
-    def temp_dir(self):
-        """Create a temporary directory for tests"""
-        temp_path = Path(tempfile.mkdtemp())
-        yield temp_path
-        shutil.rmtree(temp_path)
-    
-    @pytest.fixture
-    def sample_photo_image(self):
+    @pytest.fixture(scope="class")
+    @classmethod
+    def sample_photo_image(cls):
         """Create a sample photo-like test image with high complexity"""
-        img = Image.new("RGB", (800, 600))
-        # Create a photo-like pattern with varying colors
-        pixels = []
-        for y in range(600):
-            for x in range(800):
-                r = int(128 + 50 * ((x + y) % 100) / 100)
-                g = int(100 + 80 * ((x * 2 + y) % 150) / 150)
-                b = int(80 + 70 * ((x + y * 2) % 120) / 120)
-                pixels.append((r, g, b))
-        img.putdata(pixels)
-        return img
+        width, height = PHOTO_W, PHOTO_H
+        # Create a photo-like pattern with varying colors: each channel is a
+        # periodic ramp, so every row is a slice of one precomputed sequence
+        r_ramp = bytes(int(128 + 50 * (k % 100) / 100) for k in range(width + height))          # (x + y) % 100
+        g_ramp = bytes(int(100 + 80 * (k % 150) / 150) for k in range(2 * width + height))      # (x * 2 + y) % 150
+        b_ramp = bytes(int(80 + 70 * (k % 120) / 120) for k in range(width + 2 * height))       # (x + y * 2) % 120
+        bands = [
+            b"".join(r_ramp[y:y + width] for y in range(height)),
+            b"".join(g_ramp[y:y + 2 * width:2] for y in range(height)),
+            b"".join(b_ramp[2 * y:2 * y + width] for y in range(height)),
+        ]
+        return Image.merge("RGB", [Image.frombytes("L", (width, height), band) for band in bands])
     
-    @pytest.fixture
-    def sample_graphic_image(self):
+    @pytest.fixture(scope="class")
+    @classmethod
+    def sample_graphic_image(cls):
         """Create a sample graphic-like test image with low complexity"""
         img = Image.new("RGB", (400, 300), color=(255, 255, 255))
-        # Add simple geometric shapes
-        pixels = list(img.getdata())
-        width = 400
-        for i, (r, g, b) in enumerate(pixels):
-            x = i % width
-            y = i // width
-            if 100 <= x <= 300 and 50 <= y <= 250:
-                pixels[i] = (50, 100, 200)  # Blue rectangle
-            elif 150 <= x <= 250 and 100 <= y <= 200:
-                pixels[i] = (200, 50, 50)   # Red rectangle
-        img.putdata(pixels)
+        # Add simple geometric shapes; the red rectangle sits inside the blue
+        # one and is only drawn where blue is not, so it never shows
+        ImageDraw.Draw(img).rectangle([100, 50, 300, 250], fill=(50, 100, 200))  # Blue rectangle
         return img
     
-    @pytest.fixture
-    def sample_transparent_image(self):
+    @pytest.fixture(scope="class")
+    @classmethod
+    def sample_transparent_image(cls):
         """Create a sample image with transparency"""
         img = Image.new("RGBA", (300, 300), color=(255, 0, 0, 128))
         return img
     
+    @pytest.fixture(scope="class")
+    @classmethod
+    def photo_analysis(cls, sample_photo_image):
+        """Basic info, colour and complexity analyses of the sample photo, computed once"""
+        return (
+            _get_basic_info(sample_photo_image),
+            _analyze_colors(sample_photo_image),
+            _analyze_complexity(sample_photo_image),
+        )
+    
+    @pytest.fixture(scope="class")
+    @classmethod
+    def transparent_analysis(cls, sample_transparent_image):
+        """Basic info, colour and complexity analyses of the transparent sample, computed once"""
+        return (
+            _get_basic_info(sample_transparent_image),
+            _analyze_colors(sample_transparent_image),
+            _analyze_complexity(sample_transparent_image),
+        )
+    
+    @pytest.fixture(scope="class")
+    @classmethod
+    def photo_recommendations(cls, sample_photo_image, photo_analysis):
+        """Format recommendations for the sample photo, computed once"""
+        return _get_format_recommendations(sample_photo_image, *photo_analysis)
+    
+    @pytest.fixture(scope="class")
+    @classmethod
+    def photo_web_metrics(cls, sample_photo_image, photo_analysis):
+        """Web metrics for the sample photo, computed once"""
+        return _calculate_web_metrics(sample_photo_image, photo_analysis[0])
+    
+    @pytest.fixture(scope="class")
+    @classmethod
+    def photo_bmp_bytes(cls, sample_photo_image):
+        """Encode the sample photo once; uncompressed BMP keeps encode and decode to a copy"""
+        buffer = io.BytesIO()
+        sample_photo_image.save(buffer, format="BMP")
+        return buffer.getvalue()
+    
+    @pytest.fixture(scope="class")
+    @classmethod
+    def graphic_bmp_bytes(cls, sample_graphic_image):
+        """Encode the sample graphic once, as BMP"""
+        buffer = io.BytesIO()
+        sample_graphic_image.save(buffer, format="BMP")
+        return buffer.getvalue()
+    
     @pytest.fixture
-    def file_storage_from_image(self, sample_photo_image):
+    def file_storage_from_image(self, photo_bmp_bytes):
         """Create a FileStorage object from an image"""
-        buffer = io.BytesIO()
-        sample_photo_image.save(buffer, format="PNG")
-        buffer.seek(0)
         return FileStorage(
-            stream=buffer,
-            filename="test_photo.png",
-            content_type="image/png"
+            stream=io.BytesIO(photo_bmp_bytes),
+            filename="test_photo.bmp",
+            content_type="image/bmp"
         )
     
     def test_analyze_image_comprehensive(self, file_storage_from_image):
@@ -89,14 +143,8 @@ class TestImageAnalysis:
         result = analyze_image_comprehensive(file_storage_from_image)
         
         # Check main structure
-        required_keys = [
-            "basic_info", "color_analysis", "complexity_analysis",
-            "format_recommendations", "optimization_suggestions",
-            "web_metrics", "metadata", "filename"
-        ]
-        
-        for key in required_keys:
-            assert key in result, f"Missing key '{key}' in analysis result"
+        missing = _REQUIRED_ANALYSIS_KEYS - result.keys()
+        assert not missing, f"Missing keys {sorted(missing)} in analysis result"
         
         # Check filename sanitization
         assert result["filename"] == "test_photo"
@@ -106,18 +154,18 @@ class TestImageAnalysis:
         assert "dimensions" in basic_info
         assert "width" in basic_info
         assert "height" in basic_info
-        assert basic_info["width"] == 800
-        assert basic_info["height"] == 600
+        assert basic_info["width"] == PHOTO_W
+        assert basic_info["height"] == PHOTO_H
     
     def test_get_basic_info(self, sample_photo_image, sample_transparent_image):
         """Test basic information extraction"""
         # Test photo image
         info = _get_basic_info(sample_photo_image)
         
-        assert info["width"] == 800
-        assert info["height"] == 600
-        assert info["total_pixels"] == 480000
-        assert info["megapixels"] == 0.48
+        assert info["width"] == PHOTO_W
+        assert info["height"] == PHOTO_H
+        assert info["total_pixels"] == PHOTO_W * PHOTO_H
+        assert info["megapixels"] == round(PHOTO_W * PHOTO_H / 1_000_000, 2)
         assert info["aspect_ratio"] == pytest.approx(1.33, rel=0.01)
         assert info["category"] == "standard"
         assert info["mode"] == "RGB"
@@ -134,13 +182,8 @@ class TestImageAnalysis:
         # Test photo image (should have high complexity)
         color_analysis = _analyze_colors(sample_photo_image)
         
-        required_keys = [
-            "avg_color_range", "brightness", "unique_colors", "dominant_colors",
-            "color_harmony", "is_monochrome", "is_high_contrast", "color_complexity"
-        ]
-        
-        for key in required_keys:
-            assert key in color_analysis
+        missing = _REQUIRED_COLOR_KEYS - color_analysis.keys()
+        assert not missing, f"Missing keys {sorted(missing)} in color analysis"
         
         assert isinstance(color_analysis["avg_color_range"], (int, float))
         assert isinstance(color_analysis["brightness"], (int, float))
@@ -151,10 +194,8 @@ class TestImageAnalysis:
         # Check dominant colors structure with RGB and HEX values
         if color_analysis["dominant_colors"]:
             dominant_color = color_analysis["dominant_colors"][0]
-            required_color_keys = ["rgb", "hex", "color", "count", "percentage"]
-            
-            for key in required_color_keys:
-                assert key in dominant_color, f"Missing key '{key}' in dominant color"
+            missing = _REQUIRED_DOMINANT_COLOR_KEYS - dominant_color.keys()
+            assert not missing, f"Missing keys {sorted(missing)} in dominant color"
             
             # Check RGB structure
             assert "r" in dominant_color["rgb"]
@@ -178,13 +219,8 @@ class TestImageAnalysis:
         # Test photo image
         photo_complexity = _analyze_complexity(sample_photo_image)
         
-        required_keys = [
-            "edge_density", "texture", "detail_level", 
-            "is_photo_likely", "is_graphic_likely"
-        ]
-        
-        for key in required_keys:
-            assert key in photo_complexity
+        missing = _REQUIRED_COMPLEXITY_KEYS - photo_complexity.keys()
+        assert not missing, f"Missing keys {sorted(missing)} in complexity analysis"
         
         assert photo_complexity["texture"] in ["smooth", "moderate", "detailed"]
         assert photo_complexity["detail_level"] in ["low", "medium", "high"]
@@ -223,38 +259,19 @@ class TestImageAnalysis:
         assert mono_harmony["scheme"] == "monochromatic"
         assert mono_harmony["harmony_score"] == 100
     
-    def test_get_format_recommendations(self, sample_photo_image, sample_transparent_image):
+    def test_get_format_recommendations(self, sample_transparent_image, photo_recommendations,
+                                        transparent_analysis):
         """Test format recommendation system"""
-        # Get basic info for photo
-        photo_basic = _get_basic_info(sample_photo_image)
-        photo_colors = _analyze_colors(sample_photo_image)
-        photo_complexity = _analyze_complexity(sample_photo_image)
-        
-        recommendations = _get_format_recommendations(
-            sample_photo_image, photo_basic, photo_colors, photo_complexity
-        )
+        recommendations = photo_recommendations
         
         assert "recommendations" in recommendations
         assert "best_format" in recommendations
         
-        # Check all formats are present
-        expected_formats = ["webp", "jpeg", "png", "avif"]
-        for fmt in expected_formats:
-            assert fmt in recommendations["recommendations"]
-            
-            rec = recommendations["recommendations"][fmt]
-            assert "score" in rec
-            assert "reasons" in rec
-            assert 0 <= rec["score"] <= 100
-            assert isinstance(rec["reasons"], list)
-        
         # Best format should be in the recommendations
-        assert recommendations["best_format"] in expected_formats
+        assert recommendations["best_format"] in ANALYSIS_FORMATS
         
         # Test with transparent image
-        transparent_basic = _get_basic_info(sample_transparent_image)
-        transparent_colors = _analyze_colors(sample_transparent_image)
-        transparent_complexity = _analyze_complexity(sample_transparent_image)
+        transparent_basic, transparent_colors, transparent_complexity = transparent_analysis
         
         transparent_recommendations = _get_format_recommendations(
             sample_transparent_image, transparent_basic, transparent_colors, transparent_complexity
@@ -267,17 +284,34 @@ class TestImageAnalysis:
         
         assert max(webp_score, png_score) > jpeg_score
     
-    def test_get_optimization_suggestions(self, sample_photo_image):
-        """Test optimization suggestions"""
-        # Create a very large image to trigger size suggestions
-        large_image = sample_photo_image.resize((4000, 3000))
+    @pytest.mark.parametrize("fmt", ANALYSIS_FORMATS)
+    def test_format_recommendation_scores(self, photo_recommendations, fmt):
+        """Test each format is scored with reasons"""
+        # Check all formats are present
+        assert fmt in photo_recommendations["recommendations"]
         
-        basic_info = _get_basic_info(large_image)
-        color_analysis = _analyze_colors(large_image)
-        complexity_analysis = _analyze_complexity(large_image)
+        rec = photo_recommendations["recommendations"][fmt]
+        assert "score" in rec
+        assert "reasons" in rec
+        assert 0 <= rec["score"] <= 100
+        assert isinstance(rec["reasons"], list)
+    
+    def test_get_optimization_suggestions(self, sample_photo_image, photo_analysis):
+        """Test optimization suggestions"""
+        # Suggestions only read the size from basic_info, so report a very
+        # large image there instead of resizing one to trigger size suggestions
+        photo_basic, color_analysis, complexity_analysis = photo_analysis
+        basic_info = {
+            **photo_basic,
+            "dimensions": "4000×3000",
+            "width": 4000,
+            "height": 3000,
+            "total_pixels": 12_000_000,
+            "megapixels": 12.0,
+        }
         
         suggestions = _get_optimization_suggestions(
-            large_image, basic_info, color_analysis, complexity_analysis
+            sample_photo_image, basic_info, color_analysis, complexity_analysis
         )
         
         assert "suggestions" in suggestions
@@ -301,10 +335,9 @@ class TestImageAnalysis:
             assert "details" in suggestion
             assert suggestion["priority"] in ["low", "medium", "high"]
     
-    def test_calculate_web_metrics(self, sample_photo_image):
+    def test_calculate_web_metrics(self, photo_web_metrics):
         """Test web performance metrics calculation"""
-        basic_info = _get_basic_info(sample_photo_image)
-        metrics = _calculate_web_metrics(sample_photo_image, basic_info)
+        metrics = photo_web_metrics
         
         assert "estimated_sizes" in metrics
         assert "loading_times" in metrics
@@ -327,28 +360,28 @@ class TestImageAnalysis:
         # WebP should be smaller than JPEG
         assert sizes["webp"]["quality_85"] <= sizes["jpeg"]["quality_85"]
         
-        # Check loading times
-        loading_times = metrics["loading_times"]
-        for format_name in ["jpeg", "webp", "png", "avif"]:
-            assert format_name in loading_times
-            times = loading_times[format_name]
-            assert "3g" in times
-            assert "4g" in times
-            assert "broadband" in times
-            
-            # Faster connections should have shorter loading times
-            assert times["broadband"] <= times["4g"] <= times["3g"]
-        
         # Performance score should be reasonable
         assert 0 <= metrics["performance_score"] <= 100
     
+    @pytest.mark.parametrize("fmt", ANALYSIS_FORMATS)
+    def test_web_metrics_loading_times(self, photo_web_metrics, fmt):
+        """Test loading time estimates for each format"""
+        loading_times = photo_web_metrics["loading_times"]
+        assert fmt in loading_times
+        times = loading_times[fmt]
+        assert "3g" in times
+        assert "4g" in times
+        assert "broadband" in times
+        
+        # Faster connections should have shorter loading times
+        assert times["broadband"] <= times["4g"] <= times["3g"]
+    
     def test_extract_detailed_metadata(self, sample_photo_image):
         """Test metadata extraction"""
         metadata = _extract_detailed_metadata(sample_photo_image)
         
-        required_sections = ["basic", "exif", "camera_info", "location", "technical"]
-        for section in required_sections:
-            assert section in metadata
+        missing = _REQUIRED_METADATA_SECTIONS - metadata.keys()
+        assert not missing, f"Missing sections {sorted(missing)} in metadata"
         
         basic = metadata["basic"]
         assert "format" in basic
@@ -357,32 +390,26 @@ class TestImageAnalysis:
         assert "has_exif" in basic
         
         assert basic["mode"] == "RGB"
-        assert basic["size"] == (800, 600)
+        assert basic["size"] == (PHOTO_W, PHOTO_H)
         assert isinstance(basic["has_exif"], bool)
     
-    def test_batch_analyze_images(self, sample_photo_image, sample_graphic_image):
+    def test_batch_analyze_images(self, photo_bmp_bytes, graphic_bmp_bytes):
         """Test batch analysis functionality"""
         # Create multiple FileStorage objects
         files = []
         
         # Add photo image
-        buffer1 = io.BytesIO()
-        sample_photo_image.save(buffer1, format="PNG")
-        buffer1.seek(0)
         files.append(FileStorage(
-            stream=buffer1,
-            filename="photo.png",
-            content_type="image/png"
+            stream=io.BytesIO(photo_bmp_bytes),
+            filename="photo.bmp",
+            content_type="image/bmp"
         ))
         
         # Add graphic image
-        buffer2 = io.BytesIO()
-        sample_graphic_image.save(buffer2, format="PNG")
-        buffer2.seek(0)
         files.append(FileStorage(
-            stream=buffer2,
-            filename="graphic.png",
-            content_type="image/png"
+            stream=io.BytesIO(graphic_bmp_bytes),
+            filename="graphic.bmp",
+            content_type="image/bmp"
         ))
         
         results, errors, batch_insights = batch_analyze_images(files)
@@ -391,27 +418,9 @@ class TestImageAnalysis:
         assert len(results) == 2
         assert len(errors) == 0
         
-        # Check batch insights structure
-        assert "summary" in batch_insights
-        assert "format_distribution" in batch_insights
-        assert "complexity_distribution" in batch_insights
-        assert "recommended_formats" in batch_insights
-        assert "insights" in batch_insights
-        
-        summary = batch_insights["summary"]
-        assert summary["total_files"] == 2
-        assert summary["total_megapixels"] > 0
-        assert summary["avg_megapixels"] > 0
-        assert 0 <= summary["optimization_percentage"] <= 100
-        
-        # Check insights are actionable
-        insights = batch_insights["insights"]
-        assert isinstance(insights, list)
-        
-        for insight in insights:
-            assert "type" in insight
-            assert "message" in insight
-            assert "action" in insight
+        # Insights are built from the real analyses; their structure is
+        # covered on synthetic analyses in test_generate_batch_insights
+        assert batch_insights["summary"]["total_files"] == 2
     
     def test_generate_batch_insights(self):
         """Test batch insights generation"""
@@ -479,13 +488,19 @@ class TestImageAnalysis:
         complexity_dist = insights["complexity_distribution"]
         assert "high" in complexity_dist
         assert "low" in complexity_dist
+        
+        # Check insights are actionable
+        assert isinstance(insights["insights"], list)
+        for insight in insights["insights"]:
+            assert "type" in insight
+            assert "message" in insight
+            assert "action" in insight
     
     def test_error_handling_in_batch_analysis(self):
         """Test error handling in batch analysis"""
         # Create a mock file that will cause an error
-        buffer = io.BytesIO(b"invalid image data")
         invalid_file = FileStorage(
-            stream=buffer,
+            stream=io.BytesIO(_INVALID_PNG_BYTES),
             filename="invalid.png",
             content_type="image/png"
         )
@@ -141,6 +141,78 @@ class TestOptimizationSuite:
         assert width <= 400
         assert height <= 300
     
+    def test_optimize_image_passthrough(self, sample_image, temp_dir):
+        """Test an unchanged upload is kept when re-encoding does not shrink it"""
+        # Already saved with the optimizer's own PNG settings, so its
+        # re-encode cannot come out smaller
+        buffer = io.BytesIO()
+        sample_image.save(buffer, format="PNG", optimize=True, compress_level=9)
+        buffer.seek(0)
+        file_storage = FileStorage(stream=buffer, filename="test_image.png", content_type="image/png")
+        
+        # high_quality keeps metadata and the 800x600 sample fits its limits
+        result = optimize_image(
+            file_storage,
+            temp_dir,
+            "high_quality",
+            "png"
+        )
+        
+        assert result["passthrough"]
+        assert result["format"] == "PNG"
+        assert result["optimized_dimensions"] == "800x600"
+        assert (temp_dir / result["filename"]).read_bytes() == buffer.getvalue()
+        
+        # The kept upload was never encoded with the preset's settings
+        assert result["quality"] is None
+        assert not result["progressive"]
+        
+        # Stripping metadata always re-encodes
+        buffer.seek(0)
+        result = optimize_image(file_storage, temp_dir, "web_basic", "png")
+        assert not result["passthrough"]
+    
+    def test_optimize_image_low_compression_png_shrinks(self, temp_dir):
+        """Test a loosely compressed PNG is replaced by its smaller re-encode"""
+        # A gradient compresses noticeably better at level 9 than at level 1
+        image = Image.linear_gradient("L").resize((300, 300)).convert("RGB")
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG", compress_level=1)
+        buffer.seek(0)
+        file_storage = FileStorage(stream=buffer, filename="logo.png", content_type="image/png")
+        
+        result = optimize_image(file_storage, temp_dir, "high_quality", "auto")
+        
+        assert result["format"] == "PNG"
+        assert not result["passthrough"]
+        assert result["size_bytes"] < len(buffer.getvalue())
+    
+    def test_optimize_image_custom_quality_disables_passthrough(self, file_storage_from_image, temp_dir):
+        """Test a custom quality is always applied by re-encoding"""
+        result = optimize_image(
+            file_storage_from_image,
+            temp_dir,
+            "high_quality",
+            "png",
+            custom_quality=30
+        )
+        
+        assert not result["passthrough"]
+        assert result["quality"] == 30
+    
+    def test_optimize_image_lossy_format_not_passed_through(self, sample_image, temp_dir):
+        """Test a JPEG kept as JPEG is re-encoded with the preset's quality"""
+        buffer = io.BytesIO()
+        sample_image.save(buffer, format="JPEG", quality=100)
+        buffer.seek(0)
+        file_storage = FileStorage(stream=buffer, filename="photo.jpg", content_type="image/jpeg")
+        
+        result = optimize_image(file_storage, temp_dir, "high_quality", "jpeg")
+        
+        assert not result["passthrough"]
+        assert result["quality"] == OPTIMIZATION_PRESETS["high_quality"]["quality"]
+        assert (temp_dir / result["filename"]).read_bytes() != buffer.getvalue()
+    
     def test_batch_optimize_images(self, sample_image, temp_dir):
         """Test batch optimization"""
         # Create multiple FileStorage objects
@@ -178,6 +250,34 @@ class TestOptimizationSuite:
             output_file = temp_dir / result["filename"]
             assert output_file.exists()
     
+    def test_batch_optimize_identical_uploads(self, sample_image, temp_dir, monkeypatch):
+        """Test identical uploads are decoded once but still produce their own files"""
+        buffer = io.BytesIO()
+        sample_image.save(buffer, format="PNG")
+        files = [
+            FileStorage(stream=io.BytesIO(buffer.getvalue()), filename=name, content_type="image/png")
+            for name in ("first.png", "second.png")
+        ]
+        
+        opened = []
+        original_open = Image.open
+        def counting_open(*args, **kwargs):
+            opened.append(args)
+            return original_open(*args, **kwargs)
+        monkeypatch.setattr(Image, "open", counting_open)
+        
+        results, errors, batch_stats = batch_optimize_images(
+            files, temp_dir, "web_basic", "webp"
+        )
+        
+        assert len(opened) == 1
+        assert len(errors) == 0
+        assert [result["filename"] for result in results] == [
+            "first_optimized.webp", "second_optimized.webp"
+        ]
+        assert (temp_dir / "first_optimized.webp").read_bytes() == (temp_dir / "second_optimized.webp").read_bytes()
+        assert batch_stats["successful"] == 2
+    
     def test_resize_if_needed(self, sample_image):
         """Test image resizing function"""
         # Image that needs resizing (800x600 -> max 400x300)
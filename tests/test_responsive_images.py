@@ -7,11 +7,6 @@ import shutil
 from pathlib import Path
 from io import BytesIO
 from PIL import Image
-import sys
-import os
-
-# Add parent directory to path to import our modules
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from image_processing.responsive_images import (
     generate_responsive_images,
@@ -29,18 +24,22 @@ class MockFileStorage:
 
 class TestResponsiveImages(unittest.TestCase):
     
+    @classmethod
+    def setUpClass(cls):
+        """Create the read-only test image and its encoded bytes once"""
+        # Create test image (large enough for all responsive sizes)
+        cls.test_image = Image.new("RGB", (2000, 1500), color="blue")
+        
+        # Save test image to bytes; every test reads it through its own
+        # MockFileStorage stream, so the JPEG is only encoded once
+        cls.image_bytes = BytesIO()
+        cls.test_image.save(cls.image_bytes, format="JPEG")
+        cls.image_bytes.seek(0)
+    
     def setUp(self):
         """Set up test fixtures"""
         self.temp_dir = Path(tempfile.mkdtemp())
         
-        # Create test image (large enough for all responsive sizes)
-        self.test_image = Image.new("RGB", (2000, 1500), color="blue")
-        
-        # Save test image to bytes
-        self.image_bytes = BytesIO()
-        self.test_image.save(self.image_bytes, format="JPEG")
-        self.image_bytes.seek(0)
-        
     def tearDown(self):
         """Clean up test fixtures"""
         shutil.rmtree(self.temp_dir)
@@ -65,6 +64,7 @@ class TestResponsiveImages(unittest.TestCase):
             self.assertIn("name", result)
             self.assertIn("size_kb", result)
             self.assertIn("dimensions", result)
+            self.assertEqual(result["dimensions"], f"{result['width']}x{result['height']}")
             self.assertIn("size_name", result)
             self.assertTrue((self.temp_dir / result["name"]).exists())
             
@@ -149,6 +149,21 @@ class TestResponsiveImages(unittest.TestCase):
         if results:
             self.assertTrue(all(r["size_name"] == "mobile" for r in results))
 
+    def test_exif_rotated_jpeg(self):
+        """Test that breakpoints follow the EXIF-rotated orientation of a JPEG"""
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Rotated 90 degrees clockwise
+        rotated_bytes = BytesIO()
+        Image.new("RGB", (2000, 1000), color="blue").save(rotated_bytes, format="JPEG", exif=exif)
+        mock_file = MockFileStorage("rotated.jpg", rotated_bytes.getvalue())
+        
+        results = generate_responsive_images(mock_file, self.temp_dir, 85, False, ["mobile"])
+        
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]["dimensions"], "320x640")
+        with Image.open(self.temp_dir / results[0]["name"]) as img:
+            self.assertEqual(img.size, (320, 640))
+
 
 if __name__ == "__main__":
     unittest.main()
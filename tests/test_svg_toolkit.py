@@ -1,9 +1,11 @@
 """
 Unit tests for SVG Toolkit functionality
 """
+import io
 import unittest
 import tempfile
 from pathlib import Path
+from image_processing import svg_toolkit
 from image_processing.svg_toolkit import (
     validate_svg,
     optimize_svg,
@@ -57,6 +59,45 @@ class TestSVGToolkit(unittest.TestCase):
         self.assertTrue(result["has_viewbox"])
         self.assertGreater(result["elements_count"], 3)
     
+    def test_validate_svg_accepts_bytes_and_streams(self):
+        """Test that bytes and file-like input give the same results as a string"""
+        data = self.complex_svg.encode('utf-8')
+        
+        self.assertEqual(validate_svg(io.BytesIO(data)), validate_svg(self.complex_svg))
+        self.assertEqual(analyze_svg_complexity(data), analyze_svg_complexity(self.complex_svg))
+    
+    def test_parse_cache_keeps_digests_not_documents(self):
+        """Test that the parse cache is bounded and keyed on content digests"""
+        for i in range(svg_toolkit.SVG_PARSE_CACHE_SIZE + 8):
+            validate_svg(f'<svg xmlns="http://www.w3.org/2000/svg" width="{i}"/>')
+        
+        cache = svg_toolkit._parse_cache
+        self.assertEqual(len(cache), svg_toolkit.SVG_PARSE_CACHE_SIZE)
+        self.assertTrue(all(isinstance(key, bytes) and len(key) == 16 for key in cache))
+        
+        # The same content is served from the cache
+        latest = next(reversed(cache.values()))
+        svg = f'<svg xmlns="http://www.w3.org/2000/svg" width="{svg_toolkit.SVG_PARSE_CACHE_SIZE + 7}"/>'
+        self.assertIs(svg_toolkit._parse_once(svg), latest)
+    
+    def test_validate_svg_short_reads(self):
+        """Test that a data URI split across many short reads is still found"""
+        class OneByteReader:
+            """File-like object that returns at most one byte per read"""
+            def __init__(self, data):
+                self._stream = io.BytesIO(data)
+            
+            def read(self, size=-1):
+                return self._stream.read(1)
+        
+        data = ('<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 10 10">'
+                '<image href="data:image/png;base64,AAAA"/></svg>').encode('utf-8')
+        
+        result = validate_svg(OneByteReader(data))
+        
+        self.assertEqual(result, validate_svg(data))
+        self.assertTrue(any("embedded images" in issue for issue in result["issues"]))
+    
     def test_optimize_svg_basic(self):
         """Test basic SVG optimization"""
         result = optimize_svg(self.complex_svg, aggressive=False)
@@ -70,6 +111,14 @@ class TestSVGToolkit(unittest.TestCase):
         self.assertNotIn("metadata", optimized)
         self.assertNotIn("inkscape:", optimized)
     
+    def test_optimize_svg_removes_defs_emptied_by_metadata(self):
+        """Test that a <defs> holding only metadata is removed along with it"""
+        svg = '<svg><defs><metadata>x</metadata></defs><rect/></svg>'
+        
+        for aggressive in (False, True):
+            result = optimize_svg(svg, aggressive=aggressive)
+            self.assertEqual(result["optimized_svg"], '<svg><rect/></svg>')
+    
     def test_optimize_svg_aggressive(self):
         """Test aggressive SVG optimization"""
         result = optimize_svg(self.complex_svg, aggressive=True)
@@ -80,6 +129,14 @@ class TestSVGToolkit(unittest.TestCase):
         # Aggressive optimization should reduce precision
         optimized = result["optimized_svg"]
         self.assertNotIn("40.12345678", optimized)  # High precision should be reduced
+        self.assertIn('r="40.12"', optimized)
+    
+    def test_optimize_svg_aggressive_rounding(self):
+        """Test that precision reduction rounds and carries into the integer part"""
+        svg = '<svg xmlns="http://www.w3.org/2000/svg"><path d="M1.234 9.999 0.126 12.3449"/></svg>'
+        optimized = optimize_svg(svg, aggressive=True)["optimized_svg"]
+        
+        self.assertIn('d="M1.23 10.00 0.13 12.34"', optimized)
     
     def test_analyze_svg_complexity(self):
         """Test SVG complexity analysis"""
@@ -91,6 +148,14 @@ class TestSVGToolkit(unittest.TestCase):
         self.assertIsInstance(result["complexity_score"], (int, float))
         self.assertGreater(result["total_elements"], 0)
     
+    def test_analyze_svg_complexity_repeat_is_isolated(self):
+        """Test that repeated analysis of the same content is unaffected by caller mutation"""
+        first = analyze_svg_complexity(self.complex_svg)
+        first["element_counts"].clear()
+        
+        second = analyze_svg_complexity(self.complex_svg)
+        self.assertEqual(second["element_counts"]["circle"], 1)
+    
     def test_generate_color_variants(self):
         """Test color variant generation"""
         color_schemes = {
@@ -7,11 +7,6 @@ import shutil
 from pathlib import Path
 from io import BytesIO
 from PIL import Image
-import sys
-import os
-
-# Add parent directory to path to import our modules
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from image_processing.thumbnail_generator import (
     generate_thumbnails,
@@ -131,6 +126,7 @@ class TestThumbnailGenerator(unittest.TestCase):
             self.assertIn("name", result)
             self.assertIn("size_kb", result)
             self.assertIn("dimensions", result)
+            self.assertEqual(result["dimensions"], f"{result['width']}x{result['height']}")
             self.assertIn("size_name", result)
             self.assertIn("crop_method", result)
             
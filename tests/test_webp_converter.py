@@ -7,11 +7,6 @@ import shutil
 from pathlib import Path
 from io import BytesIO
 from PIL import Image
-import sys
-import os
-
-# Add parent directory to path to import our modules
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
 from image_processing.webp_converter import (
     sanitize_filename,
@@ -74,6 +69,10 @@ class TestWebPConverter(unittest.TestCase):
         self.assertFalse(WEB_FORMATS["jpeg"]["supports_lossless"])
         self.assertFalse(WEB_FORMATS["jpeg"]["supports_alpha"])
         
+        # Entries also expose their properties as attributes
+        self.assertEqual(WEB_FORMATS["jpeg"].ext, ".jpg")
+        self.assertEqual(WEB_FORMATS["avif"].name, "AVIF")
+        
     def test_convert_image_format_webp(self):
         """Test WebP conversion"""
         mock_file = MockFileStorage("test.jpg", self.rgb_bytes.getvalue())
@@ -136,6 +135,23 @@ class TestWebPConverter(unittest.TestCase):
         self.assertEqual(len(errors), 0)
         self.assertTrue(all("filename" in result for result in results))
         
+    def test_batch_convert_preserves_order_and_last_upload_wins(self):
+        """Test batch results follow upload order and same-named uploads overwrite in order"""
+        small = BytesIO()
+        Image.new("RGB", (10, 10), color="blue").save(small, format="PNG")
+        mock_files = [
+            MockFileStorage(f"photo{i}.png", self.rgb_bytes.getvalue()) for i in range(6)
+        ] + [
+            MockFileStorage("photo0.jpg", small.getvalue())
+        ]
+        
+        results, errors = batch_convert_images(mock_files, self.temp_dir, "png", 85, False)
+        
+        self.assertEqual(len(errors), 0)
+        self.assertEqual([r["filename"] for r in results], [f"photo{i}.png" for i in range(6)] + ["photo0.png"])
+        with Image.open(self.temp_dir / "photo0.png") as written:
+            self.assertEqual(written.size, (10, 10))
+        
     def test_get_format_comparison(self):
         """Test format comparison functionality"""
         mock_file = MockFileStorage("test.jpg", self.rgb_bytes.getvalue())
@@ -229,6 +245,12 @@ class TestWebPConverter(unittest.TestCase):
         # LA (grayscale with alpha) should have alpha
         la_img = Image.new("LA", (10, 10), color=(128, 200))
         self.assertTrue(_has_alpha_channel(la_img))
+
+        # An alpha band that is fully opaque is not meaningful
+        opaque_rgba = Image.new("RGBA", (10, 10), color=(255, 0, 0, 255))
+        self.assertFalse(_has_alpha_channel(opaque_rgba))
+        opaque_rgba.putpixel((3, 3), (255, 0, 0, 254))
+        self.assertTrue(_has_alpha_channel(opaque_rgba))
     
     def test_convert_for_format_function(self):
         """Test the format-specific conversion function"""